@@ -1,10 +1,24 @@
-import sqlite3
 import json
 import os
+import functools
+import threading
+import time
 from pathlib import Path
 from typing import List, Dict, Optional, Any
 import logging
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# SQLite récent embarqué (pysqlite3-binary) si installé, sinon celui lié à Python
+try:
+    import pysqlite3 as sqlite3  # type: ignore
+except ImportError:
+    import sqlite3
+
 # Support MySQL optionnel (piloté par variables d'environnement)
 try:
     import pymysql  # type: ignore
@@ -15,10 +29,87 @@ except Exception:  # pymysql pas requis si on reste sur sqlite
 logger = logging.getLogger(__name__)
 DB_MANAGER_VERSION = "history-debug-1"
 
+# Durée de vie des petits caches de config en mémoire (écritures faites par un autre worker)
+CONFIG_CACHE_TTL = float(os.getenv("PII_CONFIG_TTL", "30"))
+
+# Journal WAL (lectures non bloquées par une écriture d'un autre worker, un seul fsync par commit)
+SQLITE_WAL = os.getenv("DB_SQLITE_WAL", "true").lower() in ("1", "true", "yes")
+
+# Version du schéma SQLite (PRAGMA user_version) : à incrémenter avec toute nouvelle migration
+SQLITE_SCHEMA_VERSION = 2
+
+# Intervalle (s) entre deux lectures de la révision de config partagée en base (0 = à chaque accès) :
+# délai maximal avant qu'un worker voie une écriture de config faite par un autre
+CONFIG_REVISION_POLL = float(os.getenv("PII_CONFIG_REVISION_POLL", "1"))
+
+# Lecture des pages SQLite via mmap (octets, 0 désactive) : pas de read() par page manquante du cache
+SQLITE_MMAP_SIZE = int(os.getenv("DB_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+def _iter_rows(cursor, chunk: int = 256):
+    """Lignes du curseur par paquets de `chunk` (fetchmany) : pas de liste intermédiaire de toutes les lignes."""
+    while True:
+        rows = cursor.fetchmany(chunk)
+        if not rows:
+            return
+        yield from rows
+
+@functools.lru_cache(maxsize=256)
+def _decode_test_examples(raw: str):
+    """JSON test_examples décodé une fois par valeur distincte (orjson si installé) ; tuple pour ne pas
+    partager une liste modifiable entre appelants, () si JSON invalide."""
+    try:
+        parsed = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+    except ValueError:
+        return ()
+    return tuple(parsed) if isinstance(parsed, list) else parsed
+
+def _parse_test_examples(raw) -> Any:
+    parsed = _decode_test_examples(raw or '[]')
+    return list(parsed) if isinstance(parsed, tuple) else parsed
+
+# Colonnes modifiables par update_* : les clés de kwargs deviennent des noms de colonnes SQL
+_UPDATABLE_COLUMNS = {
+    'guard_types': frozenset({'name', 'display_name', 'description', 'icon', 'color', 'is_active'}),
+    'pii_fields': frozenset({'field_name', 'display_name', 'detection_type', 'example_value', 'regex_pattern',
+                             'ner_entity_type', 'confidence_threshold', 'is_active', 'priority'}),
+    'regex_patterns': frozenset({'name', 'display_name', 'pattern', 'description', 'test_examples', 'flags', 'is_active'}),
+}
+
+@functools.lru_cache(maxsize=64)
+def _update_sql(table: str, columns: tuple) -> str:
+    """Requête UPDATE pour un ensemble de colonnes (texte identique d'un appel à l'autre : cache de requêtes du moteur)."""
+    set_clause = ", ".join(f"{c} = ?" for c in columns)
+    return f"UPDATE {table} SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+
+def _config_write(fn):
+    """Incrémente config_version après une écriture de configuration (invalide les caches dérivés),
+    localement et dans la révision partagée en base (caches des autres workers).
+
+    Seulement si la méthode a réellement modifié des lignes (_mark_config_changed) : un appel
+    idempotent, sans effet ou en erreur avant écriture ne vide pas les caches des workers.
+    """
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        state = self._config_write_state()
+        outer_changed = getattr(state, 'changed', False)
+        state.changed = False
+        try:
+            return fn(self, *args, **kwargs)
+        finally:
+            changed = state.changed
+            state.changed = outer_changed or changed
+            if changed:
+                self.invalidate_config_caches()
+    return wrapper
+
 class DatabaseManager:
     def __init__(self, db_path: str = None):
         # Déterminer moteur (sqlite par défaut)
         self.engine = os.getenv("DB_ENGINE", "sqlite").lower()
+        # Compteur de version de la configuration (types, champs, patterns) pour les caches en mémoire,
+        # ajouté à la révision partagée en base (voir config_version)
+        self._local_config_version = 0
+        self._config_revision = (0, float('-inf'))
 
         # Préparer chemin SQLite par défaut, même si MySQL ciblé (pour fallback)
         current_dir = Path(__file__).parent
@@ -54,6 +145,58 @@ class DatabaseManager:
                 logger.error(f"ensure_initialized: init_database échec: {e}")
         return self.engine
 
+    @property
+    def config_version(self) -> int:
+        """Version de la configuration : écritures de ce processus + révision partagée en base
+        (relue au plus toutes les PII_CONFIG_REVISION_POLL secondes). Change dès qu'un worker
+        quelconque modifie types, champs ou patterns."""
+        return self._local_config_version + self._shared_config_revision()
+
+    def _config_write_state(self):
+        state = self.__dict__.get('_config_write_local')
+        if state is None:
+            state = self.__dict__.setdefault('_config_write_local', threading.local())
+        return state
+
+    def _mark_config_changed(self, rowcount: int = 1):
+        """Signale à @_config_write que l'écriture en cours a modifié `rowcount` lignes."""
+        if rowcount and rowcount > 0:
+            self._config_write_state().changed = True
+
+    def invalidate_config_caches(self):
+        """Change config_version dans ce processus et dans la révision partagée (autres workers)."""
+        self._local_config_version += 1
+        self._bump_config_revision()
+
+    def _shared_config_revision(self) -> int:
+        revision, read_at = self._config_revision
+        now = time.monotonic()
+        if now - read_at < CONFIG_REVISION_POLL:
+            return revision
+        try:
+            with self.get_connection() as conn:
+                row = self._query(conn, "SELECT revision FROM config_revision WHERE id = 1").fetchone()
+            if row is not None:
+                revision = int(row['revision'])
+        except Exception as e:
+            # Table absente (base pas encore migrée) ou base indisponible : dernière valeur connue
+            logger.debug(f"Lecture config_revision impossible: {e}")
+        self._config_revision = (revision, now)
+        return revision
+
+    def _bump_config_revision(self):
+        try:
+            with self.get_connection() as conn:
+                self._query(conn, "UPDATE config_revision SET revision = revision + 1 WHERE id = 1")
+                try:
+                    conn.commit()
+                except Exception:
+                    pass
+        except Exception as e:
+            logger.warning(f"Révision de config partagée non incrémentée: {e}")
+        # Relue au prochain accès
+        self._config_revision = (self._config_revision[0], float('-inf'))
+
     # ---------------- Internal helper for cross-engine SQL -----------------
     def _query(self, conn, sql: str, params: tuple = ()):  # returns a cursor
         """Unified query executor.
@@ -71,6 +214,14 @@ class DatabaseManager:
             return cur
         # sqlite
         return conn.execute(sql, params) if params else conn.execute(sql)
+
+    def _execute_many(self, conn, sql: str, seq_of_params):
+        """executemany multi-moteur (même adaptation des placeholders '?' que _query)."""
+        if self.engine == 'mysql':
+            cur = conn.cursor()
+            cur.executemany(sql.replace('?', '%s'), seq_of_params)
+            return cur
+        return conn.executemany(sql, seq_of_params)
     
     def init_database(self):
         """Initialise la base selon moteur (idempotent)."""
@@ -85,6 +236,8 @@ class DatabaseManager:
                         # S'assurer que la table usage_history existe même si schéma non ré-exécuté
                         self._ensure_usage_history_mysql(cur)
                         self._ensure_usage_history_columns_mysql(cur)
+                        self._ensure_indexes_mysql(cur)
+                        self._ensure_config_revision(cur, 'mysql')
                         conn.commit()
                         return
                     schema_path = Path(__file__).parent / 'schema_mysql.sql'
@@ -97,6 +250,9 @@ class DatabaseManager:
                     conn.commit()
                     logger.info("Base MySQL initialisée (schéma appliqué)")
             else:  # SQLite
+                # Base déjà à la version courante : ni lecture de schema.sql ni vérification des migrations
+                if self._sqlite_connection().execute("PRAGMA user_version").fetchone()[0] >= SQLITE_SCHEMA_VERSION:
+                    return
                 schema_path = Path(__file__).parent / "schema.sql"
                 if not schema_path.exists():
                     logger.error(f"Fichier schema.sql non trouvé: {schema_path}")
@@ -109,7 +265,9 @@ class DatabaseManager:
                     if not exists:
                         with open(schema_path, 'r', encoding='utf-8') as f:
                             schema_sql = f.read()
-                        conn.executescript(schema_sql)
+                        # Schéma + données initiales en une seule transaction : sinon executescript valide
+                        # chaque INSERT séparément (un fsync par instruction) ; en cas d'erreur rien n'est créé
+                        conn.executescript(f"BEGIN IMMEDIATE;\n{schema_sql}\nCOMMIT;")
                         logger.info(f"Base de données SQLite initialisée: {self.db_path}")
                     # Assurer création table usage_history si absente
                     cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='usage_history'")
@@ -127,9 +285,14 @@ class DatabaseManager:
                         """)
                         conn.commit()
                         logger.info("Table usage_history créée (migration)")
-                    else:
-                        # Migration colonnes manquantes
-                        self._ensure_usage_history_columns_sqlite(conn)
+                    # Migration colonnes manquantes
+                    migrated = self._ensure_usage_history_columns_sqlite(conn)
+                    if exists:
+                        migrated = self._ensure_indexes_sqlite(conn) and migrated
+                    migrated = self._ensure_config_revision(conn, 'sqlite') and migrated
+                    if migrated:
+                        conn.execute(f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION}")
+                        conn.commit()
         except Exception as e:
             logger.error(f"Erreur initialisation base de données: {e}")
 
@@ -206,9 +369,48 @@ class DatabaseManager:
             if 'llm_mode' not in cols:
                 cur.execute("ALTER TABLE usage_history ADD COLUMN llm_mode VARCHAR(20)")
             conn.commit()
+            return True
         except Exception as e:
             logger.error(f"Migration colonnes usage_history SQLite échouée: {e}")
+            return False
     
+    def _ensure_indexes_sqlite(self, conn):
+        """Ajoute l'index des champs actifs par type aux bases créées avant son ajout au schéma."""
+        try:
+            cur = conn.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name='idx_pii_fields_guard_active'")
+            if cur.fetchone() is None:
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_pii_fields_guard_active ON pii_fields(guard_type_id, is_active, field_name)")
+                # Statistiques pour que le planificateur choisisse l'index (une seule fois, à la création)
+                conn.execute("ANALYZE")
+                conn.commit()
+                logger.info("Index idx_pii_fields_guard_active créé (migration)")
+            return True
+        except Exception as e:
+            logger.error(f"Migration index SQLite échouée: {e}")
+            return False
+
+    def _ensure_config_revision(self, conn_or_cursor, engine: str) -> bool:
+        """Table à une ligne de la révision de config partagée entre workers (bases antérieures)."""
+        try:
+            conn_or_cursor.execute("CREATE TABLE IF NOT EXISTS config_revision (id INTEGER PRIMARY KEY, revision INTEGER NOT NULL DEFAULT 0)")
+            insert = "INSERT IGNORE" if engine == 'mysql' else "INSERT OR IGNORE"
+            conn_or_cursor.execute(f"{insert} INTO config_revision (id, revision) VALUES (1, 0)")
+            if engine == 'sqlite':
+                conn_or_cursor.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Migration config_revision ({engine}) échouée: {e}")
+            return False
+
+    def _ensure_indexes_mysql(self, cursor):
+        try:
+            cursor.execute("SHOW INDEX FROM pii_fields WHERE Key_name = 'idx_pii_fields_guard_active'")
+            if not cursor.fetchall():
+                cursor.execute("ALTER TABLE pii_fields ADD INDEX idx_pii_fields_guard_active (guard_type_id, is_active, field_name)")
+                logger.info("Index idx_pii_fields_guard_active créé (migration MySQL)")
+        except Exception as e:
+            logger.error(f"Migration index MySQL échouée: {e}")
+
     def get_connection(self):
         """Retourne une connexion (sqlite ou mysql). Bascule sur SQLite si MySQL indisponible."""
         self.ensure_initialized()
@@ -235,14 +437,77 @@ class DatabaseManager:
                 self.engine = 'sqlite'
                 # S'assurer que la base SQLite est prête
                 self.init_database()
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        return self._sqlite_connection()
+
+    def _sqlite_connection(self):
+        """Connexion SQLite réutilisée par thread (et par processus) au lieu d'un connect par requête.
+
+        `with conn:` valide ou annule la transaction sans fermer la connexion : les appelants
+        existants restent inchangés et le cache de pages SQLite reste chaud entre requêtes.
+        """
+        local = self.__dict__.get('_sqlite_local')
+        if local is None:
+            local = self.__dict__.setdefault('_sqlite_local', threading.local())
+        key = (os.getpid(), str(self.db_path))
+        conn = getattr(local, 'conn', None)
+        if conn is None or local.key != key:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            if SQLITE_WAL:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            if SQLITE_MMAP_SIZE > 0:
+                conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            local.conn, local.key = conn, key
         return conn
 
+    def _table_snapshot(self, table: str, loader) -> List[Dict]:
+        """Lignes d'une table de référence lues une fois puis servies depuis la mémoire.
+
+        Rechargées quand config_version change (écriture de config sur n'importe quel worker),
+        après invalidate_table_snapshot ou après PII_CONFIG_TTL (modifications directes en base).
+        """
+        snapshots = self.__dict__.setdefault('_table_snapshots', {})
+        now = time.monotonic()
+        version = self.config_version
+        entry = snapshots.get(table)
+        if entry is None or entry[1] != version or now - entry[0] > CONFIG_CACHE_TTL:
+            entry = snapshots[table] = (now, version, loader())
+        return entry[2]
+
+    def invalidate_table_snapshot(self, table: str = None):
+        """Oublie le snapshot d'une table (toutes si None) : relu au prochain accès."""
+        snapshots = self.__dict__.get('_table_snapshots')
+        if snapshots is None:
+            return
+        if table is None:
+            snapshots.clear()
+        else:
+            snapshots.pop(table, None)
+
+    def _update_row(self, table: str, row_id: int, values: Dict[str, Any]) -> bool:
+        """UPDATE des colonnes `values` de la ligne `row_id` (colonnes contrôlées par _UPDATABLE_COLUMNS)."""
+        unknown = set(values) - _UPDATABLE_COLUMNS[table]
+        if unknown:
+            raise ValueError(f"Colonnes non modifiables pour {table}: {sorted(unknown)}")
+        columns = tuple(sorted(values))
+        with self.get_connection() as conn:
+            cursor = self._query(conn, _update_sql(table, columns), tuple(values[c] for c in columns) + (row_id,))
+            try:
+                conn.commit()
+            except Exception:
+                pass
+            self._mark_config_changed(cursor.rowcount)
+            return cursor.rowcount > 0
+
     # =================== GESTION DES TYPES DE PROTECTION ===================
     
     def get_guard_types(self) -> List[Dict]:
         """Récupère tous les types de protection"""
+        return [dict(row) for row in self._table_snapshot('guard_types', self._load_guard_types)]
+
+    def _load_guard_types(self) -> List[Dict]:
         with self.get_connection() as conn:
             cursor = self._query(conn, """
                 SELECT id, name, display_name, description, icon, color, is_active, created_at, updated_at
@@ -250,7 +515,7 @@ class DatabaseManager:
                 WHERE is_active = 1
                 ORDER BY name
             """)
-            return [dict(row) for row in cursor.fetchall()]
+            return [dict(row) for row in _iter_rows(cursor)]
     
     def get_guard_type(self, guard_type_name: str) -> Optional[Dict]:
         """Récupère un type de protection spécifique"""
@@ -263,6 +528,25 @@ class DatabaseManager:
             row = cursor.fetchone()
             return dict(row) if row else None
     
+    def _cached_guard_type(self, guard_type_name: str) -> Optional[Dict]:
+        """get_guard_type mis en cache pour les créations de champs en série (même type à chaque fois).
+
+        Vidé quand config_version change (écriture de config sur n'importe quel worker) ou après
+        PII_CONFIG_TTL (modifications directes en base) ; un type absent n'est pas mis en cache.
+        """
+        cache = self.__dict__.get('_guard_type_cache')
+        now = time.monotonic()
+        version = self.config_version
+        if cache is None or cache['version'] != version or now - cache['loaded_at'] > CONFIG_CACHE_TTL:
+            cache = self._guard_type_cache = {'loaded_at': now, 'version': version, 'types': {}}
+        guard_type = cache['types'].get(guard_type_name)
+        if guard_type is None:
+            guard_type = self.get_guard_type(guard_type_name)
+            if guard_type:
+                cache['types'][guard_type_name] = guard_type
+        return guard_type
+
+    @_config_write
     def create_guard_type(self, name: str, display_name: str, description: str = "", 
                          icon: str = "🛡️", color: str = "#666666") -> int:
         """Crée un nouveau type de protection"""
@@ -303,6 +587,7 @@ class DatabaseManager:
                             conn.commit()
                         except Exception:
                             pass
+                        self._mark_config_changed()
                     return rid
             except Exception as e:
                 logger.debug(f"create_guard_type: reactivate-if-deleted failed (will try insert): {e}")
@@ -317,31 +602,20 @@ class DatabaseManager:
                 conn.commit()
             except Exception as e:
                 logger.debug(f"create_guard_type: commit hint (ignored) {e}")
+            self._mark_config_changed()
             rid = cursor.lastrowid
             logger.debug(f"create_guard_type: inserted id={rid}")
             return rid
     
+    @_config_write
     def update_guard_type(self, guard_id: int, **kwargs) -> bool:
         """Met à jour un type de protection"""
         if not kwargs:
             return False
         
-        # Construction dynamique de la requête UPDATE
-        set_clause = ", ".join([f"{k} = ?" for k in kwargs.keys()])
-        values = list(kwargs.values()) + [guard_id]
-        
-        with self.get_connection() as conn:
-            cursor = self._query(conn, f"""
-                UPDATE guard_types 
-                SET {set_clause}, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, tuple(values))
-            try:
-                conn.commit()
-            except Exception:
-                pass
-            return cursor.rowcount > 0
+        return self._update_row('guard_types', guard_id, kwargs)
     
+    @_config_write
     def delete_guard_type(self, guard_id: int) -> bool:
         """Supprime (désactive) un type de protection"""
         with self.get_connection() as conn:
@@ -354,6 +628,7 @@ class DatabaseManager:
                 conn.commit()
             except Exception:
                 pass
+            self._mark_config_changed(cursor.rowcount)
             return cursor.rowcount > 0
 
     # =================== GESTION DES CHAMPS PII ===================
@@ -373,26 +648,53 @@ class DatabaseManager:
                 ORDER BY pf.field_name
             """, (guard_type_name,))
             
-            fields = []
-            for row in cursor.fetchall():
+            return [self._pii_field_from_row(dict(row)) for row in _iter_rows(cursor)]
+
+    @staticmethod
+    def _pii_field_from_row(field: Dict) -> Dict:
+        """Résout le pattern effectif d'une ligne pii_fields (+ colonne regex_pattern_value jointe)."""
+        # Si c'est une référence à un pattern, utiliser le pattern de la table
+        if field['regex_pattern'] and field['regex_pattern_value']:
+            field['pattern'] = field['regex_pattern_value']
+        elif field['regex_pattern'] and not field['regex_pattern_value']:
+            # Pattern inline (directement dans le champ)
+            field['pattern'] = field['regex_pattern']
+        else:
+            field['pattern'] = None
+        
+        del field['regex_pattern_value']  # Nettoyer le champ temporaire
+        # Nettoyer anciennes clés si présentes
+        field.pop('confidence_threshold', None)
+        field.pop('priority', None)
+        return field
+
+    def get_all_guard_types_with_fields(self) -> List[Dict]:
+        """Types de protection actifs avec leurs champs PII actifs (clé 'fields'), en une seule requête
+        (au lieu de get_guard_types + un get_pii_fields par type)."""
+        with self.get_connection() as conn:
+            cursor = self._query(conn, """
+                SELECT pf.id, pf.field_name, pf.display_name, pf.detection_type,
+                       pf.example_value, pf.regex_pattern, pf.ner_entity_type,
+                       pf.is_active,
+                       gt.id as gt_id, gt.name as gt_name, gt.display_name as gt_display_name,
+                       gt.description as gt_description, gt.icon as gt_icon, gt.color as gt_color,
+                       rp.pattern as regex_pattern_value
+                FROM guard_types gt
+                LEFT JOIN pii_fields pf ON pf.guard_type_id = gt.id AND pf.is_active = 1
+                LEFT JOIN regex_patterns rp ON pf.regex_pattern = rp.name
+                WHERE gt.is_active = 1
+                ORDER BY gt.name, pf.field_name
+            """)
+            guard_types = {}
+            for row in _iter_rows(cursor):
                 field = dict(row)
-                # Si c'est une référence à un pattern, utiliser le pattern de la table
-                if field['regex_pattern'] and field['regex_pattern_value']:
-                    field['pattern'] = field['regex_pattern_value']
-                elif field['regex_pattern'] and not field['regex_pattern_value']:
-                    # Pattern inline (directement dans le champ)
-                    field['pattern'] = field['regex_pattern']
-                else:
-                    field['pattern'] = None
-                
-                del field['regex_pattern_value']  # Nettoyer le champ temporaire
-                # Nettoyer anciennes clés si présentes
-                field.pop('confidence_threshold', None)
-                field.pop('priority', None)
-                fields.append(field)
-            
-            return fields
+                guard = {key[3:]: field.pop(key) for key in list(field) if key.startswith('gt_')}
+                guard = guard_types.setdefault(guard['name'], {**guard, 'fields': []})
+                if field['id'] is not None:
+                    guard['fields'].append(self._pii_field_from_row(field))
+            return list(guard_types.values())
     
+    @_config_write
     def create_pii_field(self, guard_type_name: str, field_name: str, 
                         display_name: str, detection_type: str, 
                         example_value: str = "", regex_pattern: str = None,
@@ -400,21 +702,13 @@ class DatabaseManager:
         """Crée un nouveau champ PII"""
         
         # Récupérer l'ID du guard_type
-        guard_type = self.get_guard_type(guard_type_name)
+        guard_type = self._cached_guard_type(guard_type_name)
         if not guard_type:
             raise ValueError(f"Type de protection '{guard_type_name}' non trouvé")
         
         with self.get_connection() as conn:
-            # Idempotent: si le champ existe déjà sur ce guard_type, retourner son ID
-            try:
-                cur_check = self._query(conn, "SELECT id FROM pii_fields WHERE guard_type_id = ? AND field_name = ? AND is_active = 1", (guard_type['id'], field_name))
-                row = cur_check.fetchone()
-                if row:
-                    return (row['id'] if isinstance(row, dict) else row[0])
-            except Exception as e:
-                logger.debug(f"create_pii_field: check exist failed (continuing to insert): {e}")
-
-            # Reactivate soft-deleted field with same name for this guard_type to avoid UNIQUE constraint
+            # Idempotent: si le champ existe déjà sur ce guard_type, retourner son ID ; s'il est désactivé,
+            # le réactiver (contrainte UNIQUE). Une seule lecture : UNIQUE(guard_type_id, field_name)
             try:
                 cur_any = self._query(conn, "SELECT id, is_active FROM pii_fields WHERE guard_type_id = ? AND field_name = ? LIMIT 1", (guard_type['id'], field_name))
                 row_any = cur_any.fetchone()
@@ -441,6 +735,7 @@ class DatabaseManager:
                             conn.commit()
                         except Exception:
                             pass
+                        self._mark_config_changed()
                     return rid
             except Exception as e:
                 logger.debug(f"create_pii_field: reactivate-if-deleted failed (will try insert): {e}")
@@ -466,28 +761,85 @@ class DatabaseManager:
                 conn.commit()
             except Exception as e:
                 logger.debug(f"create_pii_field: commit hint (ignored) {e}")
+            self._mark_config_changed()
             return cursor.lastrowid
     
-    def update_pii_field(self, field_id: int, **kwargs) -> bool:
-        """Met à jour un champ PII"""
-        if not kwargs:
-            return False
-        
-        set_clause = ", ".join([f"{k} = ?" for k in kwargs.keys()])
-        values = list(kwargs.values()) + [field_id]
-        
+    @_config_write
+    def bulk_create_pii_fields(self, rows: List[Dict]) -> List[int]:
+        """Crée plusieurs champs PII en une transaction (clés de create_pii_field par ligne).
+
+        Même sémantique que create_pii_field appelé ligne par ligne (champ actif existant -> son ID,
+        champ désactivé -> réactivé), mais 4 requêtes au total au lieu de 2-3 par champ.
+        Retourne les IDs dans l'ordre de `rows`.
+        """
+        if not rows:
+            return []
+        names = sorted({r['guard_type_name'] for r in rows})
         with self.get_connection() as conn:
             cursor = self._query(conn, f"""
-                UPDATE pii_fields 
-                SET {set_clause}, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, tuple(values))
+                SELECT id, name FROM guard_types WHERE name IN ({",".join("?" * len(names))}) AND is_active = 1
+            """, tuple(names))
+            guard_ids = {row['name']: row['id'] for row in _iter_rows(cursor)}
+            missing = [name for name in names if name not in guard_ids]
+            if missing:
+                raise ValueError(f"Type(s) de protection non trouvé(s): {missing}")
+
+            def existing_fields():
+                ids = sorted(set(guard_ids.values()))
+                cur = self._query(conn, f"""
+                    SELECT id, guard_type_id, field_name, is_active FROM pii_fields
+                    WHERE guard_type_id IN ({",".join("?" * len(ids))})
+                """, tuple(ids))
+                return {(row['guard_type_id'], row['field_name']): (row['id'], int(row['is_active'] or 0))
+                        for row in _iter_rows(cur)}
+
+            existing = existing_fields()
+            inserts, reactivations, seen = [], [], set()
+            for r in rows:
+                key = (guard_ids[r['guard_type_name']], r['field_name'])
+                if key in seen:
+                    continue
+                seen.add(key)
+                values = (r['display_name'], r['detection_type'], r.get('example_value', ''),
+                          r.get('regex_pattern'), r.get('ner_entity_type'))
+                if key not in existing:
+                    inserts.append(key + values)
+                elif existing[key][1] == 0:
+                    reactivations.append(values + (existing[key][0],))
+
+            if self.engine == 'mysql':
+                conn.begin()
+            if reactivations:
+                self._execute_many(conn, """
+                    UPDATE pii_fields
+                    SET is_active = 1, display_name = ?, detection_type = ?, example_value = ?,
+                        regex_pattern = ?, ner_entity_type = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, reactivations)
+            if inserts:
+                self._execute_many(conn, """
+                    INSERT INTO pii_fields
+                    (guard_type_id, field_name, display_name, detection_type,
+                     example_value, regex_pattern, ner_entity_type)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, inserts)
+                existing = existing_fields()
             try:
                 conn.commit()
             except Exception:
                 pass
-            return cursor.rowcount > 0
+            self._mark_config_changed(len(reactivations) + len(inserts))
+            return [existing[(guard_ids[r['guard_type_name']], r['field_name'])][0] for r in rows]
+
+    @_config_write
+    def update_pii_field(self, field_id: int, **kwargs) -> bool:
+        """Met à jour un champ PII"""
+        if not kwargs:
+            return False
+        
+        return self._update_row('pii_fields', field_id, kwargs)
     
+    @_config_write
     def delete_pii_field(self, field_id: int) -> bool:
         """Supprime (désactive) un champ PII"""
         with self.get_connection() as conn:
@@ -500,6 +852,7 @@ class DatabaseManager:
                 conn.commit()
             except Exception:
                 pass
+            self._mark_config_changed(cursor.rowcount)
             return cursor.rowcount > 0
 
     # =================== GESTION DES PATTERNS REGEX ===================
@@ -516,13 +869,10 @@ class DatabaseManager:
             """)
             
             patterns = []
-            for row in cursor.fetchall():
+            for row in _iter_rows(cursor):
                 pattern = dict(row)
                 # Parser les exemples JSON
-                try:
-                    pattern['test_examples'] = json.loads(pattern['test_examples'] or '[]')
-                except json.JSONDecodeError:
-                    pattern['test_examples'] = []
+                pattern['test_examples'] = _parse_test_examples(pattern['test_examples'])
                 patterns.append(pattern)
             
             return patterns
@@ -540,13 +890,11 @@ class DatabaseManager:
             
             if row:
                 pattern = dict(row)
-                try:
-                    pattern['test_examples'] = json.loads(pattern['test_examples'] or '[]')
-                except json.JSONDecodeError:
-                    pattern['test_examples'] = []
+                pattern['test_examples'] = _parse_test_examples(pattern['test_examples'])
                 return pattern
             return None
     
+    @_config_write
     def create_regex_pattern(self, name: str, display_name: str, pattern: str,
                            description: str = "", test_examples: List[str] = None,
                            flags: str = "i") -> int:
@@ -590,6 +938,7 @@ class DatabaseManager:
                             conn.commit()
                         except Exception:
                             pass
+                        self._mark_config_changed()
                     return rid
             except Exception as e:
                 logger.debug(f"create_regex_pattern: reactivate-if-deleted failed (will try insert): {e}")
@@ -603,8 +952,10 @@ class DatabaseManager:
                 conn.commit()
             except Exception:
                 pass
+            self._mark_config_changed()
             return cursor.lastrowid
     
+    @_config_write
     def update_regex_pattern(self, pattern_id: int, **kwargs) -> bool:
         """Met à jour un pattern regex"""
         if not kwargs:
@@ -614,21 +965,9 @@ class DatabaseManager:
         if 'test_examples' in kwargs:
             kwargs['test_examples'] = json.dumps(kwargs['test_examples'])
         
-        set_clause = ", ".join([f"{k} = ?" for k in kwargs.keys()])
-        values = list(kwargs.values()) + [pattern_id]
-        
-        with self.get_connection() as conn:
-            cursor = self._query(conn, f"""
-                UPDATE regex_patterns 
-                SET {set_clause}, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, tuple(values))
-            try:
-                conn.commit()
-            except Exception:
-                pass
-            return cursor.rowcount > 0
+        return self._update_row('regex_patterns', pattern_id, kwargs)
     
+    @_config_write
     def delete_regex_pattern(self, pattern_id: int) -> bool:
         """Supprime (désactive) un pattern regex"""
         with self.get_connection() as conn:
@@ -641,28 +980,25 @@ class DatabaseManager:
                 conn.commit()
             except Exception:
                 pass
+            self._mark_config_changed(cursor.rowcount)
             return cursor.rowcount > 0
 
     # =================== GESTION DES TYPES NER ===================
     
     def get_ner_entity_types(self, model_name: str = None) -> List[Dict]:
         """Récupère les types d'entités NER disponibles"""
-        query = """
-            SELECT id, model_name, entity_type, display_name, description, is_active
-            FROM ner_entity_types 
-            WHERE is_active = 1
-        """
-        params = []
-        
-        if model_name:
-            query += " AND model_name = ?"
-            params.append(model_name)
-        
-        query += " ORDER BY model_name, entity_type"
-        
+        rows = self._table_snapshot('ner_entity_types', self._load_ner_entity_types)
+        return [dict(row) for row in rows if not model_name or row['model_name'] == model_name]
+
+    def _load_ner_entity_types(self) -> List[Dict]:
         with self.get_connection() as conn:
-            cursor = self._query(conn, query, tuple(params))
-            return [dict(row) for row in cursor.fetchall()]
+            cursor = self._query(conn, """
+                SELECT id, model_name, entity_type, display_name, description, is_active
+                FROM ner_entity_types 
+                WHERE is_active = 1
+                ORDER BY model_name, entity_type
+            """)
+            return [dict(row) for row in _iter_rows(cursor)]
 
     # =================== HISTORIQUE UTILISATION ===================
     def add_usage_history(self, guard_type: str, masked_text: str,
@@ -839,5 +1175,26 @@ class DatabaseManager:
             row = cursor.fetchone()
             return dict(row) if row else None
 
+# Instance partagée, construite au premier usage (pas de connexion ni de bootstrap à l'import du module)
+_db_manager = None
+_db_manager_lock = threading.Lock()
+
+def get_db_manager() -> DatabaseManager:
+    """Retourne le DatabaseManager partagé, construit au premier appel (thread-safe)."""
+    global _db_manager
+    if _db_manager is None:
+        with _db_manager_lock:
+            if _db_manager is None:
+                _db_manager = DatabaseManager()
+    return _db_manager
+
+class _LazyDatabaseManager:
+    """Relais vers get_db_manager() : l'instance n'est créée qu'au premier attribut lu ou écrit."""
+    def __getattr__(self, name):
+        return getattr(get_db_manager(), name)
+
+    def __setattr__(self, name, value):
+        setattr(get_db_manager(), name, value)
+
 # Instance globale
-db_manager = DatabaseManager()
+db_manager = _LazyDatabaseManager()
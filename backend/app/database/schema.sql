@@ -58,6 +58,9 @@ CREATE TABLE ner_entity_types (
     UNIQUE(model_name, entity_type)
 );
 
+-- Champs actifs d'un type de protection, déjà triés par nom (get_pii_fields)
+CREATE INDEX IF NOT EXISTS idx_pii_fields_guard_active ON pii_fields(guard_type_id, is_active, field_name);
+
 -- Données initiales
 INSERT INTO guard_types (name, display_name, description, icon, color) VALUES
 ('TypeA', '🆔 Données Personnelles Identifiantes', 'Protection des informations d''identité personnelle', '🆔', '#e74c3c'),
@@ -129,3 +132,10 @@ INSERT INTO pii_fields (guard_type_id, field_name, display_name, detection_type,
 (3, 'postal_code', 'Code Postal', 'regex', '75001', 'french_postal_code', NULL, 4),
 (3, 'company', 'Entreprise', 'ner', 'TechCorp SARL', NULL, 'ORG', 5),
 (3, 'ip_address', 'Adresse IP', 'regex', '192.168.1.1', '\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}', NULL, 6);
+
+-- Révision de la configuration, incrémentée à chaque écriture (invalidation des caches de tous les workers)
+CREATE TABLE IF NOT EXISTS config_revision (
+    id INTEGER PRIMARY KEY,
+    revision INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO config_revision (id, revision) VALUES (1, 0);
@@ -26,6 +26,7 @@ CREATE TABLE IF NOT EXISTS pii_fields (
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   UNIQUE KEY uniq_guard_field (guard_type_id, field_name),
+  KEY idx_pii_fields_guard_active (guard_type_id, is_active, field_name),
   CONSTRAINT fk_pii_guard FOREIGN KEY (guard_type_id) REFERENCES guard_types(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
@@ -65,3 +66,10 @@ CREATE TABLE IF NOT EXISTS usage_history (
   model VARCHAR(50) DEFAULT NULL,
   llm_mode VARCHAR(20) DEFAULT NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Révision de la configuration, incrémentée à chaque écriture (invalidation des caches de tous les workers)
+CREATE TABLE IF NOT EXISTS config_revision (
+  id INT PRIMARY KEY,
+  revision INT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+INSERT IGNORE INTO config_revision (id, revision) VALUES (1, 0);
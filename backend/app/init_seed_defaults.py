@@ -103,14 +103,14 @@ def seed_defaults() -> dict:
             try:
                 conn = pymysql.connect(host=host, port=port, user=user, password=pwd, database=db, charset='utf8mb4')
                 with conn:
+                    # Une seule transaction et un INSERT multi-lignes par table (executemany de PyMySQL
+                    # regroupe les VALUES) au lieu d'un aller-retour par ligne
                     with conn.cursor() as cur:
                         # Seed guard_types idempotently
-                        for g in DEFAULT_GUARDS:
-                            cur.execute(
-                                "INSERT IGNORE INTO guard_types (name, display_name, description, icon, color) VALUES (%s,%s,%s,%s,%s)",
-                                (g['name'], g['display_name'], g['description'], g['icon'], g['color'])
-                            )
-                        conn.commit()
+                        cur.executemany(
+                            "INSERT IGNORE INTO guard_types (name, display_name, description, icon, color) VALUES (%s,%s,%s,%s,%s)",
+                            ((g['name'], g['display_name'], g['description'], g['icon'], g['color']) for g in DEFAULT_GUARDS)
+                        )
                         cur.execute(
                             "SELECT name FROM guard_types WHERE name IN (%s,%s,%s)",
                             (DEFAULT_GUARDS[0]['name'], DEFAULT_GUARDS[1]['name'], DEFAULT_GUARDS[2]['name'])
@@ -120,12 +120,11 @@ def seed_defaults() -> dict:
                             if g['name'] in present:
                                 created_guards.append(g['name'])
                         # Seed regex_patterns (idempotent)
-                        for name, display, patt, desc, examples, flags in DEFAULT_PATTERNS:
-                            cur.execute(
-                                "INSERT IGNORE INTO regex_patterns (name, display_name, pattern, description, test_examples, flags) VALUES (%s,%s,%s,%s,%s,%s)",
-                                (name, display, patt, desc, json.dumps(examples or []), flags)
-                            )
-                        conn.commit()
+                        cur.executemany(
+                            "INSERT IGNORE INTO regex_patterns (name, display_name, pattern, description, test_examples, flags) VALUES (%s,%s,%s,%s,%s,%s)",
+                            ((name, display, patt, desc, json.dumps(examples or []), flags)
+                             for name, display, patt, desc, examples, flags in DEFAULT_PATTERNS)
+                        )
                         # Report which patterns are present now
                         placeholders = ",".join(["%s"] * len(DEFAULT_PATTERNS))
                         cur.execute(
@@ -141,26 +140,26 @@ def seed_defaults() -> dict:
                         )
                         for rid, nm in cur.fetchall():
                             name_to_id[nm] = rid
-                        for g in DEFAULT_GUARDS:
-                            gid = name_to_id.get(g['name'])
-                            if not gid:
-                                continue
-                            for f in g['fields']:
-                                cur.execute(
-                                    "INSERT IGNORE INTO pii_fields (guard_type_id, field_name, display_name, detection_type, example_value, regex_pattern, ner_entity_type) VALUES (%s,%s,%s,%s,%s,%s,%s)",
-                                    (gid, f['field_name'], f['display_name'], f['type'], f.get('example', ''), f.get('pattern'), f.get('ner_entity_type'))
-                                )
-                        conn.commit()
+                        field_rows = [
+                            (name_to_id[g['name']], f['field_name'], f['display_name'], f['type'], f.get('example', ''), f.get('pattern'), f.get('ner_entity_type'))
+                            for g in DEFAULT_GUARDS if name_to_id.get(g['name'])
+                            for f in g['fields']
+                        ]
+                        if field_rows:
+                            cur.executemany(
+                                "INSERT IGNORE INTO pii_fields (guard_type_id, field_name, display_name, detection_type, example_value, regex_pattern, ner_entity_type) VALUES (%s,%s,%s,%s,%s,%s,%s)",
+                                field_rows
+                            )
                         # Seed NER entity types (idempotent)
                         try:
-                            for model_name, entity_type, display_name, description in DEFAULT_NER_TYPES:
-                                cur.execute(
-                                    "INSERT IGNORE INTO ner_entity_types (model_name, entity_type, display_name, description, is_active) VALUES (%s, %s, %s, %s, 1)",
-                                    (model_name, entity_type, display_name, description)
-                                )
-                            conn.commit()
+                            cur.executemany(
+                                "INSERT IGNORE INTO ner_entity_types (model_name, entity_type, display_name, description, is_active) VALUES (%s, %s, %s, %s, %s)",
+                                ((model_name, entity_type, display_name, description, 1)
+                                 for model_name, entity_type, display_name, description in DEFAULT_NER_TYPES)
+                            )
                         except Exception as ner_e:
                             logger.warning(f"Seed NER MySQL ignoré: {ner_e}")
+                        conn.commit()
             except Exception as e:
                 logger.warning(f"Seed MySQL direct a échoué ({e}), bascule via db_manager")
                 # Fallback to db_manager flow below
@@ -176,26 +175,36 @@ def seed_defaults() -> dict:
                 db_manager.create_regex_pattern(name, display, patt, desc, examples, flags)
                 added_patterns.append(name)
 
-        existing_guards = {g['name'] for g in db_manager.get_guard_types()}
+        # Types existants et leurs champs actifs en une requête : seuls les champs manquants sont créés
+        # (create_pii_field coûte 3 requêtes et invalide les caches de config même pour un champ existant)
+        existing_guards = {
+            g['name']: {f['field_name'] for f in g['fields']}
+            for g in db_manager.get_all_guard_types_with_fields()
+        }
         for g in DEFAULT_GUARDS:
             if g['name'] not in existing_guards:
                 db_manager.create_guard_type(g['name'], g['display_name'], g['description'], g['icon'], g['color'])
                 created_guards.append(g['name'])
-            # Ensure fields
-            for f in g['fields']:
-                try:
-                    db_manager.create_pii_field(
-                        guard_type_name=g['name'],
-                        field_name=f['field_name'],
-                        display_name=f['display_name'],
-                        detection_type=f['type'],
-                        example_value=f.get('example', ''),
-                        regex_pattern=f.get('pattern'),
-                        ner_entity_type=f.get('ner_entity_type')
-                    )
-                    created_fields += 1
-                except Exception:
-                    continue
+        # Champs manquants de tous les types créés en une seule transaction
+        missing_fields = [
+            {
+                'guard_type_name': g['name'],
+                'field_name': f['field_name'],
+                'display_name': f['display_name'],
+                'detection_type': f['type'],
+                'example_value': f.get('example', ''),
+                'regex_pattern': f.get('pattern'),
+                'ner_entity_type': f.get('ner_entity_type'),
+            }
+            for g in DEFAULT_GUARDS
+            for f in g['fields']
+            if f['field_name'] not in existing_guards.get(g['name'], set())
+        ]
+        if missing_fields:
+            try:
+                created_fields = len(db_manager.bulk_create_pii_fields(missing_fields))
+            except Exception as e:
+                logger.warning(f"Seed des champs PII ignoré: {e}")
 
         # Seed NER entity types via a direct connection if table exists
         try:
@@ -240,6 +249,8 @@ def seed_defaults() -> dict:
                         pass
         except Exception as e:
             logger.warning(f"Seeding NER types (fallback) ignoré: {e}")
+        # Tables de référence écrites hors des méthodes de db_manager : snapshots en mémoire à relire
+        db_manager.invalidate_table_snapshot()
 
         return {"success": True, "patterns_added": added_patterns, "guards_created": created_guards, "fields_created": created_fields}
     except Exception as e:
@@ -1,6 +1,7 @@
 import logging
 import os
 import time
+from functools import lru_cache
 # Correction du chemin pour éviter le double 'backend'
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOG_PATH = os.path.join(BASE_DIR, "logs", "app.log")
@@ -11,14 +12,17 @@ logging.basicConfig(
     format="%(asctime)s %(levelname)s %(message)s",
     datefmt="%Y-%m-%d %H:%M:%S"
 )
-logging.getLogger().setLevel(logging.DEBUG)
+# Niveau global via LOG_LEVEL (INFO par défaut) : les traces DEBUG de détection ne sont formatées que si activées
+logging.getLogger().setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, StringConstraints
 from .services.guard_service import GuardService
+from .services.pii_detector_french import get_pii_detector
 from .utils.dynamic_config_loader import dynamic_config_loader
+from .utils.token_manager import token_cache_info
 from .api.config_api import config_router
-from typing import Dict, List
+from typing import Annotated, Dict, List
 # Import db_manager and try to import DB_MANAGER_VERSION with a safe fallback
 try:
     from .database.db_manager import db_manager, DB_MANAGER_VERSION  # type: ignore
@@ -67,6 +71,21 @@ def _startup_seed_defaults():
             logging.getLogger(__name__).warning(f"Seed défauts tentative {i+1}/{retries} échouée: {e}")
             time.sleep(delay)
 
+# Préchargement du détecteur PII partagé (modèles + Presidio) pour ne pas pénaliser la première requête
+@app.on_event("startup")
+def _startup_warm_detector():
+    if os.getenv("PII_WARMUP", "1").lower() not in ("1", "true", "yes"):
+        return
+    try:
+        t0 = time.perf_counter()
+        detector = get_pii_detector()
+        # detect() ne charge que ce que la config utilise : chargement explicite de tous les modèles
+        detector.preload()
+        detector.detect("Bonjour, je m'appelle Jean Dupont.")
+        logging.getLogger(__name__).info(f"Détecteur PII préchargé en {round((time.perf_counter() - t0) * 1000)} ms")
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Préchargement détecteur PII échoué: {e}")
+
 # Root simple (utile pour tests manuels, renvoie statut de base)
 @app.get("/")
 def root():
@@ -95,6 +114,25 @@ def health():
         status["error"] = str(e)
     return status
 
+# Mesure du temps de traitement par requête (middleware ASGI pur, sans BaseHTTPMiddleware)
+class TimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.logger = logging.getLogger(__name__)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            dur_ms = (time.perf_counter() - start) * 1000
+            self.logger.info("%s %s %.3fms", scope.get("method", ""), scope["path"], dur_ms)
+
+app.add_middleware(TimingMiddleware)
+
 # Configuration CORS pour permettre les requêtes depuis le frontend React
 app.add_middleware(
     CORSMiddleware,
@@ -111,6 +149,11 @@ from fastapi import Response  # (plus d'endpoint /logs — historique via /usage
 
 guard_service = GuardService()
 
+@app.on_event("shutdown")
+async def _shutdown_close_http():
+    guard_service.llm_service.close()
+    await guard_service.llm_service.aclose()
+
 class ProcessRequest(BaseModel):
     text: str
     guard_type: str
@@ -135,9 +178,14 @@ def mask_only(request: MaskOnlyRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Clés de la forme <type:TOKEN_xxx> : bornées pour limiter le coût de validation des gros payloads
+TokenKey = Annotated[str, StringConstraints(max_length=256)]
+
 class FinalizeRequest(BaseModel):
+    # Validation entièrement dans le cœur Rust de Pydantic v2 (pas de validateur Python par clé)
+    model_config = ConfigDict(extra='forbid')
     masked: str
-    tokens: Dict[str, str]
+    tokens: Dict[TokenKey, str]
     guard_type: str
 
 @app.post("/finalize")
@@ -180,27 +228,30 @@ def get_usage(entry_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@lru_cache(maxsize=1)
+def _usage_columns(engine: str) -> tuple:
+    """Colonnes de usage_history, lues une fois par processus (le schéma ne change pas à chaud)."""
+    with db_manager.get_connection() as conn:
+        cur = conn.cursor()
+        if engine == 'mysql':
+            cur.execute("SHOW COLUMNS FROM usage_history")
+            return tuple((r['Field'] if isinstance(r, dict) and 'Field' in r else r[0]) for r in cur.fetchall())
+        cur.execute("PRAGMA table_info(usage_history)")
+        return tuple(r[1] for r in cur.fetchall())
+
 @app.get("/usage/debug")
-def usage_debug():
+def usage_debug(sample: bool = False):
     try:
         info = {"engine": getattr(db_manager, 'engine', 'unknown')}
-        with db_manager.get_connection() as conn:
-            cur = conn.cursor()
-            engine = info['engine']
-            if engine == 'mysql':
-                cur.execute("SHOW COLUMNS FROM usage_history")
-                cols = [r[0] for r in cur.fetchall()]
-            else:
-                cur.execute("PRAGMA table_info(usage_history)")
-                cols = [r[1] for r in cur.fetchall()]
-            info['columns'] = cols
-            # Try sample row
+        info['columns'] = list(_usage_columns(info['engine']))
+        info['token_cache'] = token_cache_info()
+        # Ligne d'exemple uniquement sur demande explicite (?sample=1)
+        if sample:
             try:
-                cursor2 = conn.execute("SELECT * FROM usage_history ORDER BY id DESC LIMIT 1") if db_manager.engine != 'mysql' else conn.cursor()
-                if db_manager.engine == 'mysql':
-                    cursor2.execute("SELECT * FROM usage_history ORDER BY id DESC LIMIT 1")
-                row = cursor2.fetchone()
-                info['last_row'] = dict(row) if row else None
+                with db_manager.get_connection() as conn:
+                    cursor2 = db_manager._query(conn, "SELECT * FROM usage_history ORDER BY id DESC LIMIT 1")
+                    row = cursor2.fetchone()
+                    info['last_row'] = dict(row) if row else None
             except Exception as inner:
                 info['last_row_error'] = str(inner)
         return {"success": True, "data": info}
@@ -237,6 +288,7 @@ def reload_configuration(guard_type: str = None):
     """Recharge la configuration depuis la base de données"""
     try:
         dynamic_config_loader.reload_config(guard_type)
+        _usage_columns.cache_clear()
         return {
             "message": f"Configuration {'de ' + guard_type if guard_type else 'complète'} rechargée avec succès"
         }
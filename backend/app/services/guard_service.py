@@ -1,7 +1,7 @@
 import logging
-from ..services.pii_detector_french import PIIDetectorFrench
+from ..services.pii_detector_french import get_pii_detector
 from ..utils.token_manager import TokenManager
-from ..services.llm_service import LLMService
+from ..services.llm_service import get_llm_service
 from typing import Dict, Tuple
 from ..database.db_manager import db_manager
 from ..utils.dynamic_config_loader import dynamic_config_loader
@@ -10,8 +10,8 @@ class GuardService:
     def __init__(self, key: str = "ia_guards_secret_2025"):
         # Services légers toujours prêts
         self.token_manager = TokenManager(key)
-        self.llm_service = LLMService()
-        # Lazy init du détecteur (déclenchera le téléchargement des modèles au premier /process)
+        self.llm_service = get_llm_service()
+        # Lazy init du détecteur partagé (chargé au démarrage si PII_WARMUP=1, sinon au premier /process)
         self.pii_detector = None  # type: ignore
         # Accès au chargeur de configuration dynamique (DB)
         self.config_loader = dynamic_config_loader
@@ -21,7 +21,7 @@ class GuardService:
         logging.info(f"Début du traitement du texte (guard_type={guard_type})")
         # Initialize detector on first use (may download spaCy model)
         if self.pii_detector is None:
-            self.pii_detector = PIIDetectorFrench()
+            self.pii_detector = get_pii_detector()
         all_entities = self.pii_detector.detect(text, guard_type)  # 🆕 Passer guard_type
         logging.info(f"Entités détectées : {[(e['text'], e['type']) for e in all_entities]}")
 
@@ -37,6 +37,7 @@ class GuardService:
         masked_text, tokens = self.generate_tokens(text, entities)
         logging.info(f"Texte masqué généré : {masked_text}")
 
+        llm_payload = None
         try:
             llm_payload = self.llm_service.send_to_llm(masked_text)
             llm_content = llm_payload.get('content') if isinstance(llm_payload, dict) else str(llm_payload)
@@ -52,6 +53,8 @@ class GuardService:
         try:
             masked_token_count = len(tokens)
             llm_mode = 'disabled' if completion_tokens == 0 and prompt_tokens > 0 and llm_content.startswith('[LLM') else 'enabled'
+            if isinstance(llm_payload, dict) and llm_payload.get('cached'):
+                llm_mode = 'cached'
             db_manager.add_usage_history(
                 guard_type, masked_text, prompt_tokens, completion_tokens, masked_token_count,
                 model=getattr(self.llm_service, 'model', None), llm_mode=llm_mode
@@ -140,7 +143,7 @@ class GuardService:
         """Retourne uniquement le texte masqué et les tokens, sans appeler le LLM."""
         # Initialize detector on first use
         if self.pii_detector is None:
-            self.pii_detector = PIIDetectorFrench()
+            self.pii_detector = get_pii_detector()
         all_entities = self.pii_detector.detect(text, guard_type)
 
         allowed_types = self.config_loader.get_guard_types(guard_type)
@@ -155,6 +158,7 @@ class GuardService:
 
     def finalize_with_mask(self, masked_text: str, tokens: Dict[str, str], guard_type: str) -> Dict:
         """Envoie le texte masqué au LLM, puis démasque la réponse à l'aide des tokens."""
+        llm_payload = None
         try:
             llm_payload = self.llm_service.send_to_llm(masked_text)
             llm_content = llm_payload.get('content') if isinstance(llm_payload, dict) else str(llm_payload)
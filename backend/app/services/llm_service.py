@@ -1,10 +1,17 @@
-import openai
+import asyncio
 import os
-import json
 import time
-from typing import Dict, Optional
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
 import logging
+import httpx
+from openai import OpenAI, AsyncOpenAI, APIStatusError, __version__ as OPENAI_CLIENT_VERSION
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 try:
@@ -24,96 +31,180 @@ try:
 except Exception as _e:
     print(f"⚠️ Chargement .env échoué: {_e}")
 
+# Variables d'environnement lues une seule fois au chargement du module (après .env)
+OPENAI_API_KEY = (os.getenv("OPENAI_API_KEY") or "").strip().strip('"').strip("'") or None  # nettoyer guillemets éventuels
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+# Nombre de réponses LLM gardées en cache (correspondance exacte du texte masqué) ; 0 = désactivé
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+
 try:
     import tiktoken  # type: ignore
 except Exception:  # tiktoken optionnel
     tiktoken = None
 
+_SYSTEM = "You are a helpful assistant."
+# Consigne explicite envoyée avec chaque texte (message système construit une seule fois)
+_INSTRUCTION = (
+    "ATTENTION : Les entités sensibles dans ce texte ont été remplacées par des tokens de la forme <type:TOKEN_xxx>. "
+    "Quand vous répondez à une question sur une entité masquée, répondez uniquement en réutilisant le token correspondant, sans inventer ni deviner la donnée réelle. "
+    "Exemple : Si on demande le numéro de sécurité sociale, répondez : <social_security:TOKEN_xxx>. "
+    "Ne dites jamais que vous ne pouvez pas répondre, ne donnez pas de conseils de sécurité, ne reformulez pas la question. "
+    "Répondez uniquement avec le token haché approprié."
+)
+_SYSTEM_MESSAGE = {"role": "system", "content": _SYSTEM + "\n" + _INSTRUCTION}
+
+def _build_messages(text: str) -> list:
+    return [_SYSTEM_MESSAGE, {"role": "user", "content": text}]
+
 def _approx_token_count(text: str) -> int:
     if not text:
         return 0
     return max(1, int(len(text.split()) * 1.1))
 
+@lru_cache(maxsize=1)
+def _get_fallback_encoder():
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+@lru_cache(maxsize=32)
+def _get_encoder(model: str):
+    """Encodeur tiktoken résolu une seule fois par modèle (le chargement des tables BPE est coûteux)."""
+    if not tiktoken:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        return _get_fallback_encoder()
+
+def _encode_count(model: str, text: str) -> int:
+    enc = _get_encoder(model)
+    if enc is None:
+        return _approx_token_count(text)
+    try:
+        return len(enc.encode(text))
+    except Exception:
+        return _approx_token_count(text)
+
+# Cache LRU des comptages, indexé par (modèle, empreinte blake2b du texte) pour ne pas garder les textes en mémoire
+_TOKEN_COUNT_CACHE_SIZE = 4096
+_token_count_cache: "OrderedDict[tuple, int]" = OrderedDict()
+_token_count_lock = threading.Lock()
+
 def _count_tokens(model: str, text: str) -> int:
     if not text:
         return 0
-    if tiktoken:
-        try:
-            enc = tiktoken.encoding_for_model(model)
-        except Exception:
-            try:
-                enc = tiktoken.get_encoding("cl100k_base")
-            except Exception:
-                return _approx_token_count(text)
-        try:
-            return len(enc.encode(text))
-        except Exception:
-            return _approx_token_count(text)
-    return _approx_token_count(text)
+    key = (model, hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest())
+    with _token_count_lock:
+        cached = _token_count_cache.get(key)
+        if cached is not None:
+            _token_count_cache.move_to_end(key)
+            return cached
+    count = _encode_count(model, text)
+    with _token_count_lock:
+        _token_count_cache[key] = count
+        if len(_token_count_cache) > _TOKEN_COUNT_CACHE_SIZE:
+            _token_count_cache.popitem(last=False)
+    return count
 
 class LLMService:
     def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
-        if api_key:
-            openai.api_key = api_key.strip().strip('"').strip("'")  # nettoyer guillemets éventuels
-            print(f"✅ OPENAI_API_KEY chargé (longueur={len(openai.api_key)}).")
+        self._api_key = OPENAI_API_KEY
+        if self._api_key:
+            print(f"✅ OPENAI_API_KEY chargé (longueur={len(self._api_key)}).")
         else:
             print("⚠️ OPENAI_API_KEY non défini - appels LLM désactivés")
-        requested_model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
-        self.model = requested_model
-        # Détection version client & compatibilité modèles
-        try:
-            import pkg_resources  # type: ignore
-            version = pkg_resources.get_distribution('openai').version
-        except Exception:
-            version = '0.0'
-        self.client_version = version
-        if version.startswith('0.') and requested_model.startswith('gpt-4-turbo'):
-            # Ancien client ne gère probablement pas ce label marketing -> fallback
-            fallback = os.getenv('OPENAI_MODEL_FALLBACK', 'gpt-3.5-turbo')
-            print(f"⚠️ Client OpenAI {version} incompatible avec {requested_model}. Fallback vers {fallback} (mettre à jour la lib pour utiliser les modèles turbo).")
-            self.model = fallback
-        print(f"🧪 LLMService initialisé (client={version}, model_effectif={self.model})")
-
-        # Support nouveau client 1.x
+        self.model = OPENAI_MODEL
+        self.client_version = OPENAI_CLIENT_VERSION
+        print(f"🧪 LLMService initialisé (client={self.client_version}, model_effectif={self.model})")
+        # Cache LRU des réponses (temperature=0 : même texte masqué -> même réponse)
+        self._response_cache: "OrderedDict[tuple, Dict[str, int | str]]" = OrderedDict()
+        self._response_cache_lock = threading.Lock()
+        # Comptage de la consigne constante fait une seule fois (ajouté tel quel au comptage du texte)
+        self._instruction_tokens = _count_tokens(self.model, _SYSTEM_MESSAGE["content"])
+
+        # Clients OpenAI 1.x (sync + async) : retries et pool httpx intégrés
         self._client = None
-        if not version.startswith('0.'):
+        self._aclient = None
+        if self._api_key:
             try:
-                from openai import OpenAI  # type: ignore
-                self._client = OpenAI(api_key=openai.api_key or os.getenv("OPENAI_API_KEY"))
-                print("🧩 Client OpenAI 1.x initialisé")
+                self._client = OpenAI(api_key=self._api_key, max_retries=2, timeout=30.0)
+                self._aclient = AsyncOpenAI(
+                    api_key=self._api_key,
+                    max_retries=2,
+                    http_client=httpx.AsyncClient(
+                        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0),
+                        timeout=30
+                    )
+                )
             except Exception as cli_e:
                 print(f"⚠️ Impossible d'initialiser client OpenAI 1.x: {cli_e}")
                 logger.exception("Init client OpenAI 1.x échouée")
 
+        # Session HTTP réutilisée (keep-alive + pool) pour le fallback HTTP brut
+        self._http = requests.Session()
+        self._http.mount("https://", HTTPAdapter(
+            pool_connections=20, pool_maxsize=100,
+            max_retries=Retry(total=2, backoff_factor=0.2)
+        ))
+        self._http.headers.update({
+            "Authorization": f"Bearer {self._api_key}",
+            "Content-Type": "application/json"
+        })
+
+    def close(self):
+        """Ferme la session HTTP (à appeler à l'arrêt de l'application)."""
+        self._http.close()
+
+    def _cache_key(self, text: str) -> tuple:
+        return (self.model, hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest())
+
+    def _cache_get(self, text: str) -> Optional[Dict[str, int | str]]:
+        if LLM_CACHE_SIZE <= 0:
+            return None
+        key = self._cache_key(text)
+        with self._response_cache_lock:
+            cached = self._response_cache.get(key)
+            if cached is None:
+                return None
+            self._response_cache.move_to_end(key)
+        logger.debug("Réponse LLM servie depuis le cache")
+        # Aucun token consommé : ne pas recompter l'appel d'origine dans l'historique
+        return {**cached, "prompt_tokens": 0, "completion_tokens": 0, "cached": True}
+
+    def _cache_put(self, text: str, result: Dict[str, int | str]):
+        if LLM_CACHE_SIZE <= 0:
+            return
+        key = self._cache_key(text)
+        with self._response_cache_lock:
+            self._response_cache[key] = dict(result)
+            self._response_cache.move_to_end(key)
+            if len(self._response_cache) > LLM_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+
     def send_to_llm(self, text: str) -> Dict[str, int | str]:
-        # Ajoute une consigne explicite pour le LLM
-        instruction = (
-            "ATTENTION : Les entités sensibles dans ce texte ont été remplacées par des tokens de la forme <type:TOKEN_xxx>. "
-            "Quand vous répondez à une question sur une entité masquée, répondez uniquement en réutilisant le token correspondant, sans inventer ni deviner la donnée réelle. "
-            "Exemple : Si on demande le numéro de sécurité sociale, répondez : <social_security:TOKEN_xxx>. "
-            "Ne dites jamais que vous ne pouvez pas répondre, ne donnez pas de conseils de sécurité, ne reformulez pas la question. "
-            "Répondez uniquement avec le token haché approprié."
-        )
-        prompt = instruction + "\n\n" + text
-        print(f"Envoi au LLM : {prompt}")  # Log pour débogage
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Envoi au LLM : %.80s", text)
         try:
-            if not getattr(openai, 'api_key', None):
-                approx = _approx_token_count(prompt)
+            if not self._api_key:
+                approx = _approx_token_count(_INSTRUCTION) + _approx_token_count(text)
                 return {"content": "[LLM désactivé]", "prompt_tokens": approx, "completion_tokens": 0}
+            cached = self._cache_get(text)
+            if cached is not None:
+                return cached
             content = ''
             usage = {}
             error_chain: list[str] = []
+            # Le fallback HTTP ne sert que sans client ou sur erreur serveur / réseau persistante
+            http_fallback = self._client is None
 
-            # 1. Essai client officiel 1.x
+            # 1. Client officiel 1.x
             if self._client:
                 try:
                     response = self._client.chat.completions.create(
                         model=self.model,
-                        messages=[
-                            {"role": "system", "content": "You are a helpful assistant."},
-                            {"role": "user", "content": prompt}
-                        ],
+                        messages=_build_messages(text),
                         max_tokens=100,
                         temperature=0
                     )
@@ -128,25 +219,20 @@ class LLMService:
                     err1 = f"client1x:{e1}"[:160]
                     error_chain.append(err1)
                     logger.warning(f"Chat client1x échec: {err1}")
+                    # Erreurs 4xx (clé, quota, requête) : inutile de rejouer la même requête en HTTP brut
+                    http_fallback = not (isinstance(e1, APIStatusError) and e1.status_code < 500)
 
-            # 2. Fallback HTTP brut si content vide
-            if not content:
+            # 2. Fallback HTTP brut
+            if not content and http_fallback:
                 try:
                     http_payload = {
                         "model": self.model,
-                        "messages": [
-                            {"role": "system", "content": "You are a helpful assistant."},
-                            {"role": "user", "content": prompt}
-                        ],
+                        "messages": _build_messages(text),
                         "max_tokens": 100,
                         "temperature": 0
                     }
-                    headers = {
-                        "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}",
-                        "Content-Type": "application/json"
-                    }
                     t0 = time.time()
-                    r = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, data=json.dumps(http_payload), timeout=30)
+                    r = self._http.post("https://api.openai.com/v1/chat/completions", json=http_payload, timeout=30)
                     if r.status_code == 200:
                         data = r.json()
                         choices = data.get('choices') or []
@@ -159,19 +245,123 @@ class LLMService:
                 except Exception as e2:
                     error_chain.append(f"http_exc:{e2}"[:120])
 
-            prompt_tokens = usage.get('prompt_tokens') if isinstance(usage, dict) else None
-            completion_tokens = usage.get('completion_tokens') if isinstance(usage, dict) else None
-            if prompt_tokens is None:
-                prompt_tokens = _count_tokens(self.model, prompt)
-            if completion_tokens is None:
-                completion_tokens = _count_tokens(self.model, content)
-            if not content:
-                content = f"[Erreur LLM] {' | '.join(error_chain) or 'inconnue'}"
-                completion_tokens = 0
-            return {"content": content, "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+            return self._build_result(text, content, usage, error_chain)
         except Exception as e:
             # Ne pas lever pour éviter tokens = 0 côté appelant; fournir estimation
             err = str(e)
-            print(f"❌ Erreur OpenAI: {err}")
-            approx_prompt = _count_tokens(self.model, prompt)
-            return {"content": f"[Erreur LLM] {err[:160]}", "prompt_tokens": approx_prompt, "completion_tokens": 0}
\ No newline at end of file
+            logger.warning(f"❌ Erreur OpenAI: {err}")
+            approx_prompt = self._instruction_tokens + _count_tokens(self.model, text)
+            return {"content": f"[Erreur LLM] {err[:160]}", "prompt_tokens": approx_prompt, "completion_tokens": 0}
+
+    def send_to_llm_stream(self, text: str) -> Iterator[str]:
+        """Variante streaming de send_to_llm : produit les fragments de réponse au fil de l'eau.
+
+        La réponse complète (avec comptage des tokens) est mise en cache à la fin du flux.
+        """
+        if not self._client:
+            yield self.send_to_llm(text)["content"]
+            return
+        cached = self._cache_get(text)
+        if cached is not None:
+            yield cached["content"]
+            return
+        parts: list[str] = []
+        usage = {}
+        try:
+            stream = self._client.chat.completions.create(
+                model=self.model,
+                messages=_build_messages(text),
+                max_tokens=100,
+                temperature=0,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            for chunk in stream:
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content or ''
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+                if getattr(chunk, 'usage', None):
+                    usage = {
+                        'prompt_tokens': chunk.usage.prompt_tokens,
+                        'completion_tokens': chunk.usage.completion_tokens
+                    }
+        except Exception as e:
+            logger.warning(f"Chat client streaming échec: {str(e)[:160]}")
+            if not parts:
+                yield self.send_to_llm(text)["content"]
+            # Réponse partielle : déjà transmise, mais pas mise en cache
+            return
+        content = ''.join(parts)
+        if usage.get('completion_tokens') is None and content:
+            usage['completion_tokens'] = _count_tokens(self.model, content)
+        self._build_result(text, content, usage, [])
+
+    def _build_result(self, text: str, content: str, usage, error_chain: list) -> Dict[str, int | str]:
+        """Complète les compteurs de tokens manquants et formate la réponse commune sync/async."""
+        usage = usage if isinstance(usage, dict) else {}
+        prompt_tokens = usage.get('prompt_tokens')
+        if prompt_tokens is None:
+            prompt_tokens = self._instruction_tokens + _count_tokens(self.model, text)
+        if not content:
+            content = f"[Erreur LLM] {' | '.join(error_chain) or 'inconnue'}"
+            return {"content": content, "prompt_tokens": prompt_tokens, "completion_tokens": 0}
+        completion_tokens = usage.get('completion_tokens')
+        if completion_tokens is None:
+            # Estimation bon marché (~4 caractères / token) plutôt qu'un encodage BPE complet
+            completion_tokens = max(1, len(content) // 4)
+        result = {"content": content, "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+        # Seules les réponses valides sont mises en cache
+        self._cache_put(text, result)
+        return result
+
+    # --- Variante asynchrone pour traiter plusieurs textes en parallèle ---
+    async def _send_to_llm_async(self, text: str, semaphore: asyncio.Semaphore) -> Dict[str, int | str]:
+        if self._api_key:
+            cached = self._cache_get(text)
+            if cached is not None:
+                return cached
+        async with semaphore:
+            # Sans client async (ou clé absente), réutiliser la chaîne synchrone complète hors boucle
+            if self._aclient is None or not self._api_key:
+                return await asyncio.to_thread(self.send_to_llm, text)
+            try:
+                response = await self._aclient.chat.completions.create(
+                    model=self.model,
+                    messages=_build_messages(text),
+                    max_tokens=100,
+                    temperature=0
+                )
+            except Exception as e:
+                logger.warning(f"Chat client async échec: {str(e)[:160]}")
+                return await asyncio.to_thread(self.send_to_llm, text)
+            choice0 = response.choices[0] if response.choices else None
+            content = (choice0.message.content if choice0 and choice0.message else '') or ''
+            if not content:
+                return await asyncio.to_thread(self.send_to_llm, text)
+            usage_obj = getattr(response, 'usage', None)
+            usage = {
+                'prompt_tokens': getattr(usage_obj, 'prompt_tokens', None) if usage_obj else None,
+                'completion_tokens': getattr(usage_obj, 'completion_tokens', None) if usage_obj else None
+            }
+            return self._build_result(text, content, usage, [])
+
+    async def send_to_llm_batch(self, texts: List[str], concurrency: int = 8) -> List[Dict[str, int | str]]:
+        """Envoie plusieurs textes masqués en parallèle (au plus `concurrency` appels simultanés).
+
+        À appeler depuis la boucle d'événements de l'application : le client httpx async y est rattaché.
+        Le résultat conserve l'ordre de `texts`.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        return list(await asyncio.gather(*(self._send_to_llm_async(t, semaphore) for t in texts)))
+
+    async def aclose(self):
+        """Ferme le client async (à appeler à l'arrêt de l'application)."""
+        if self._aclient is not None:
+            await self._aclient.close()
+
+@lru_cache(maxsize=1)
+def get_llm_service() -> LLMService:
+    """Instance partagée de LLMService (clients HTTP et comptage du préfixe initialisés une seule fois)."""
+    return LLMService()
@@ -1,25 +1,348 @@
 import re
 import logging
 import os
+import threading
+import sys
+import time
+import hashlib
+import bisect
+import functools
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+try:
+    from re import _parser as _sre_parse, _constants as _sre_c  # Python >= 3.11
+except ImportError:
+    import sre_parse as _sre_parse, sre_constants as _sre_c
 from typing import List, Dict
-from app.utils.regex_patterns import PII_PATTERNS
+from app.utils.regex_patterns import scan as pii_static_scan
 from app.utils.nlp_utils_enhanced import NLPModels
 from app.utils.common_words_filter import filter_false_positives
 from app.utils.dynamic_config_loader import dynamic_config_loader
+from app.utils.entity_mapping import CANONICAL_ENTITIES
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Cache LRU des résultats de detect() : nombre d'entrées (0 = désactivé) et durée de vie en secondes.
+# La clé inclut db.config_version (révision partagée en base) : une écriture de config faite par un
+# autre worker invalide ce cache au plus PII_CONFIG_REVISION_POLL secondes plus tard
+DETECT_CACHE_SIZE = int(os.getenv("PII_DETECT_CACHE_SIZE", "4096"))
+DETECT_CACHE_TTL = float(os.getenv("PII_DETECT_CACHE_TTL", "300"))
+
+# Couverture regex (part du texte) au-delà de laquelle les modèles transformers ne sont pas lancés,
+# et seulement si le reste du texte ne contient aucune lettre (aucun nom possible). Désactivé par
+# défaut (> 1.0) : un nom à côté d'un long IBAN ou email doit toujours passer par les modèles
+EARLY_EXIT_COVERAGE = float(os.getenv("PII_EARLY_EXIT_COVERAGE", "2"))
+
+# Part maximale du texte masquable avant l'inférence NER (au-delà, le texte original est analysé)
+NER_MASK_MAX_RATIO = float(os.getenv("PII_NER_MASK_MAX_RATIO", "0.5"))
+
+# Fusion vectorisée (numpy, noyau numba si installé) à partir de ce nombre d'entités ;
+# en dessous le balayage Python suffit
+MERGE_NUMPY_MIN = 32
+_NAME_TYPES = ('name', 'full_name', 'firstname')
+
+# BERT multilingue en plus de CamemBERT (mêmes étiquettes PER/LOC/ORG) : désactivé par défaut
+# quand CamemBERT est chargé, réactivable pour privilégier le rappel
+USE_BERT_FALLBACK = os.getenv("PII_USE_BERT_FALLBACK", "0").lower() in ("1", "true", "yes")
+
+# Durée de vie (s) de l'instantané de config DB : borne le délai de prise en compte d'une
+# modification faite par un autre worker (celles de ce processus sont vues immédiatement)
+CONFIG_SNAPSHOT_TTL = float(os.getenv("PII_CONFIG_TTL", "30"))
+
+# Types produits par CamemBERT / BERT -> entité canonique du champ NER qu'ils peuvent compléter
+_FALLBACK_SEMANTIC_MAP = MappingProxyType({
+    'name': 'PERSON', 'company': 'ORGANIZATION', 'address': 'LOCATION', 'birth_date': 'DATE_TIME'
+})
+# Entités que les modèles de repli fournissent réellement (ils n'émettent jamais birth_date)
+_MODEL_FILLABLE_TYPES = frozenset(_FALLBACK_SEMANTIC_MAP[t] for t in ('name', 'company', 'address'))
+# Attendre Presidio et ne lancer les modèles que pour les entités qu'il n'a pas trouvées
+# (moins de calcul, mais les occurrences supplémentaires d'un type déjà trouvé sont perdues)
+FALLBACK_ONLY_MISSING = os.getenv("PII_FALLBACK_ONLY_MISSING", "0").lower() in ("1", "true", "yes")
+
+# Filtres CVV (années plausibles, contexte lexical) compilés une fois
+_CVV_YEAR_RE = re.compile(r'19\d\d|20\d\d')
+_CVV_CONTEXT_RE = re.compile(r'cvv|cvc|code\s+de\s+s[eé]curit[ée]|s[eé]curit[ée]', re.IGNORECASE)
+
+# Heuristique prénoms : "je m'appelle" + "mon ami(e) s'appelle" + prénom seul en tête de texte
+_NAME_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r"\bje\s+m['’ ]?app(?:e|a)l(?:e|le)\s+([a-zA-ZÀ-ÖØ-öø-ÿ'’\-]{2,40})",
+    r"\bmon\s+ami[e]?\s+s['’ ]?app(?:e|a)l(?:e|le)\s+([a-zA-ZÀ-ÖØ-öø-ÿ'’\-]{2,40})",
+    r"^\s*([a-zà-öø-ÿ]{2,30})(?=\s*[,:])"  # début de texte: josh, doua,
+))
+_NAME_NOISE = frozenset({"mon", "ami", "amie", "appelle", "appel", "je"})
+
+# Types équivalents projetés vers un type canonique quand ils couvrent le même span
+_UNIFY_GROUPS = (
+    ("identity_document", frozenset({"id_card", "passport"})),
+)
+
+@functools.lru_cache(maxsize=512)
+def _compile_db_pattern(pattern: str):
+    """Pattern regex DB compilé (insensible à la casse), réutilisé d'une version de config à l'autre."""
+    return re.compile(pattern, re.IGNORECASE)
+
+# Pré-filtre RE2 : hors ASCII, ou avec \v / \x1c-\x1f (espaces pour re mais pas pour RE2),
+# les classes \d \w \s \b divergent entre re et RE2 et le pré-filtre n'est pas utilisé
+_RE2_UNSAFE_CHARS = re.compile(r'[\x0b\x1c-\x1f]')
+
+def _build_re2_prefilter(patterns: List[str]):
+    """RE2::Set des patterns DB (DFA unique, insensible à la casse) : (set, index set -> index plan,
+    patterns toujours scannés). Les patterns non supportés par RE2 ou ancrés en fin ($, \\Z, dont la
+    sémantique diffère) sont toujours scannés. None si google-re2 est absent."""
+    if not RE2_AVAILABLE:
+        return None
+    options = re2.Options()
+    options.case_sensitive = False
+    re2_set = re2.Set.SearchSet(options)
+    set_ids, always = {}, set()
+    for i, pattern in enumerate(patterns):
+        if '$' in pattern or '\\Z' in pattern:
+            always.add(i)
+            continue
+        try:
+            set_ids[re2_set.Add(pattern)] = i
+        except Exception:
+            always.add(i)
+    if not set_ids:
+        return None
+    re2_set.Compile()
+    return re2_set, set_ids, always
+
+# Ancres des patterns DB : caractères présents dans tout match, testés par de simples `in` quand
+# le pré-filtre RE2 ne s'applique pas. Lettres exclues (patterns insensibles à la casse).
+_DIGIT_RE = re.compile(r'\d')
+_REPEAT_OPS = tuple(op for op in (_sre_c.MAX_REPEAT, _sre_c.MIN_REPEAT,
+                                  getattr(_sre_c, 'POSSESSIVE_REPEAT', None)) if op is not None)
+
+def _is_digit_item(item) -> bool:
+    op, av = item
+    if op is _sre_c.CATEGORY:
+        return av is _sre_c.CATEGORY_DIGIT
+    if op is _sre_c.RANGE:
+        return 48 <= av[0] and av[1] <= 57
+    return op is _sre_c.LITERAL and 48 <= av <= 57
+
+def _required_chars(items) -> tuple:
+    """(caractères ASCII non alphabétiques obligatoires, chiffre obligatoire) d'une séquence parsée."""
+    chars, digit = set(), False
+    for op, av in items:
+        if op is _sre_c.LITERAL:
+            c = chr(av)
+            if c.isascii() and not c.isalpha():
+                chars.add(c)
+                digit = digit or c.isdigit()
+        elif op is _sre_c.IN:
+            digit = digit or all(_is_digit_item(item) for item in av)
+        elif op in _REPEAT_OPS:
+            if av[0] >= 1:
+                sub_chars, sub_digit = _required_chars(av[2])
+                chars |= sub_chars
+                digit = digit or sub_digit
+        elif op is _sre_c.SUBPATTERN or op is getattr(_sre_c, 'ATOMIC_GROUP', None):
+            sub_chars, sub_digit = _required_chars(av[-1] if op is _sre_c.SUBPATTERN else av)
+            chars |= sub_chars
+            digit = digit or sub_digit
+        elif op is _sre_c.BRANCH:
+            # Obligatoire seulement si requis par chaque alternative
+            alternatives = [_required_chars(alt) for alt in av[1]]
+            chars |= set.intersection(*(a[0] for a in alternatives))
+            digit = digit or all(a[1] for a in alternatives)
+    return chars, digit
+
+def _pattern_anchors(pattern: str):
+    """(caractères obligatoires, chiffre obligatoire) pour un pattern DB, None s'il n'en a pas."""
+    try:
+        chars, digit = _required_chars(_sre_parse.parse(pattern, re.IGNORECASE))
+    except Exception:
+        return None
+    if not chars and not digit:
+        return None
+    return frozenset(chars), digit
+
+# Types des modèles -> types d'application (tables figées, partagées par tous les appels)
+_PRESIDIO_TYPE_MAP = MappingProxyType({
+    "PERSON": "name",
+    "EMAIL_ADDRESS": "email",
+    "PHONE_NUMBER": "phone",
+    "CREDIT_CARD": "credit_card",
+    "IBAN_CODE": "iban",
+    "DATE_TIME": "birth_date",
+    "LOCATION": "address",
+    "IP_ADDRESS": "ip_address",
+    "SSN": "social_security",
+    "PASSPORT": "passport",
+    "ORGANIZATION": "company"
+})
+_CAMEMBERT_TYPE_MAP = MappingProxyType({
+    "PER": "name",        # Personne
+    "PERS": "name",       # Variante personne
+    "LOC": "address",     # Lieu
+    "ORG": "company",     # Organisation
+    "MISC": "unknown"     # Divers
+})
+_BERT_TYPE_MAP = MappingProxyType({
+    "PER": "name",     # Personne → nom
+    "PERSON": "name",  # Alternative
+    "LOC": "address",  # Lieu → adresse
+    "ORG": "company",  # Organisation → entreprise
+    "MISC": "name"     # Divers → nom (au cas où)
+})
+_SPACY_TYPE_MAP = MappingProxyType({
+    "PER": "name",
+    "LOC": "address",
+    "ORG": "company"
+})
+# Entités Presidio réellement consommées (champs NER canoniques + mapping ci-dessus)
+PRESIDIO_WANTED_ENTITIES = frozenset(CANONICAL_ENTITIES) | frozenset(_PRESIDIO_TYPE_MAP)
+
+# Composants spaCy inutiles quand seules les entités nommées sont lues
+_SPACY_UNUSED_FOR_NER = ["tagger", "parser", "attribute_ruler", "lemmatizer", "morphologizer", "senter"]
 
 # Nouveau : Ajout de Presidio pour une détection PII spécialisée
 try:
-    from presidio_analyzer import AnalyzerEngine
-    from presidio_analyzer.nlp_engine import NlpEngineProvider
+    from presidio_analyzer import AnalyzerEngine, RecognizerRegistry
+    from presidio_analyzer.nlp_engine import SpacyNlpEngine
     PRESIDIO_AVAILABLE = True
+
+    class _SharedSpacyNlpEngine(SpacyNlpEngine):
+        """Moteur spaCy Presidio construit sur des pipelines déjà chargés (pas de second spacy.load)."""
+        def __init__(self, nlp_by_lang: Dict, models: List[Dict]):
+            super().__init__(models=models)
+            self.nlp = nlp_by_lang
+
+        def process_text(self, text: str, language: str):
+            # Presidio ne lit que les tokens, les entités et les lemmes (mots de contexte) : composants
+            # morpho-syntaxiques sautés, lemme approché par la forme minuscule
+            doc = self.nlp[language](text, disable=_SPACY_UNUSED_FOR_NER)
+            for token in doc:
+                if not token.lemma_:
+                    token.lemma_ = token.lower_
+            return self._doc_to_nlp_artifact(doc, language)
 except ImportError:
     PRESIDIO_AVAILABLE = False
     print("Presidio non installé. Utilisation des modèles français uniquement.")
 
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _merge_kernel(starts, ends, conf, is_name, max_gap):
+        """Balayage de _merge_entities sur tableaux triés : pour chaque entité retenue, indice de la
+        dernière entité source, bornes, score et indicateur de fusion de noms adjacents."""
+        n = starts.shape[0]
+        out_idx = np.empty(n, np.int64)
+        out_start = np.empty(n, np.int64)
+        out_end = np.empty(n, np.int64)
+        out_conf = np.empty(n, np.float64)
+        out_name = np.empty(n, np.bool_)
+        out_fused = np.empty(n, np.bool_)
+        m = 0
+        for i in range(n):
+            if m > 0:
+                ls = out_start[m - 1]
+                le = out_end[m - 1]
+                # Chevauchement : meilleur score ou entité la plus longue
+                if starts[i] < le and ends[i] > ls:
+                    if conf[i] > out_conf[m - 1] or (ends[i] - starts[i]) > (le - ls):
+                        out_idx[m - 1] = i
+                        out_start[m - 1] = starts[i]
+                        out_end[m - 1] = ends[i]
+                        out_conf[m - 1] = conf[i]
+                        out_name[m - 1] = is_name[i]
+                        out_fused[m - 1] = False
+                    continue
+                # Noms adjacents fusionnés
+                gap = starts[i] - le
+                if is_name[i] and out_name[m - 1] and 0 <= gap <= max_gap:
+                    out_idx[m - 1] = i
+                    out_end[m - 1] = ends[i]
+                    out_conf[m - 1] = max(conf[i], out_conf[m - 1])
+                    out_name[m - 1] = True
+                    out_fused[m - 1] = True
+                    continue
+            out_idx[m] = i
+            out_start[m] = starts[i]
+            out_end[m] = ends[i]
+            out_conf[m] = conf[i]
+            out_name[m] = is_name[i]
+            out_fused[m] = False
+            m += 1
+        return out_idx[:m], out_start[:m], out_end[:m], out_conf[:m], out_fused[:m]
+
+def _span_index(entities: List[Dict]) -> tuple:
+    """Index des intervalles (start, end) : débuts triés et fin maximale cumulée."""
+    spans = sorted((e['start'], e['end']) for e in entities)
+    starts, max_ends, max_end = [], [], -1
+    for start, end in spans:
+        max_end = max(max_end, end)
+        starts.append(start)
+        max_ends.append(max_end)
+    return starts, max_ends
+
+def _span_overlaps(index: tuple, start: int, end: int) -> bool:
+    """Vrai si [start, end) chevauche un intervalle de l'index (O(log n))."""
+    starts, max_ends = index
+    i = bisect.bisect_left(starts, end)
+    return i > 0 and max_ends[i - 1] > start
+
+def _span_contains(index: tuple, start: int, end: int) -> bool:
+    """Vrai si [start, end) est inclus dans un intervalle de l'index (O(log n))."""
+    starts, max_ends = index
+    i = bisect.bisect_right(starts, start)
+    return i > 0 and max_ends[i - 1] >= end
+
+def _spans_contained(index: tuple, entities: List[Dict]) -> List[bool]:
+    """_span_contains pour chaque entité, vectorisé (np.searchsorted) à partir de MERGE_NUMPY_MIN entités."""
+    starts, max_ends = index
+    if not starts:
+        return [False] * len(entities)
+    if not (NUMPY_AVAILABLE and len(entities) >= MERGE_NUMPY_MIN):
+        return [_span_contains(index, e['start'], e['end']) for e in entities]
+    n = len(entities)
+    ent_starts = np.fromiter((e['start'] for e in entities), np.int64, count=n)
+    ent_ends = np.fromiter((e['end'] for e in entities), np.int64, count=n)
+    i = np.searchsorted(np.asarray(starts, dtype=np.int64), ent_starts, side='right')
+    covered_to = np.asarray(max_ends, dtype=np.int64)[np.maximum(i - 1, 0)]
+    return ((i > 0) & (covered_to >= ent_ends)).tolist()
+
+def _safe_detector(name: str, batched: bool = False):
+    """Isole les erreurs d'un détecteur : journalise une fois et renvoie un résultat vide
+    ([] ou une liste vide par texte pour les variantes *_many)."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def inner(self, texts, *args, **kwargs):
+            try:
+                return fn(self, texts, *args, **kwargs)
+            except Exception as e:
+                logger.warning("Erreur %s : %s", name, e)
+                return [[] for _ in texts] if batched else []
+        return inner
+    return deco
+
 class PIIDetectorFrench:
     def __init__(self):
-        # Initialisation des modèles internes
-        self.models = NLPModels()
+        # Modèles internes (spaCy, CamemBERT, BERT) chargés paresseusement au premier usage :
+        # un worker dont la config n'utilise que des regex ne les charge jamais
+        self._models = None
+        self._model_passes = None
+        self._models_lock = threading.Lock()
         self.config_loader = dynamic_config_loader  # Configuration dynamique
         self.presidio_init_error = None
 
@@ -27,25 +350,83 @@ class PIIDetectorFrench:
         from app.utils.entity_mapping import ENTITY_MAPPING
         self.entity_mapping = ENTITY_MAPPING
 
-        print(f"📋 Modèles disponibles : {', '.join(self.models.get_available_models())}")
         print("🔧 Configuration dynamique activée")
         print(f"🔄 Mapping d'entités configuré: {len(self.entity_mapping)} entrées (canoniques + synonymes)")
         # Mode rappel élevé pour PERSON (peut augmenter faux positifs) activable par env
         self.high_recall_person = os.getenv('PII_HIGH_RECALL_PERSON', '0').lower() in ('1','true','yes')
 
-        # Initialisation de Presidio (multi-lang si possible)
-        self.presidio_analyzer = None
-        if PRESIDIO_AVAILABLE:
-            self._init_presidio()
-        else:
+        # Cache des résultats par (guard_type, empreinte du texte, version de config DB)
+        self._detect_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._detect_cache_lock = threading.Lock()
+        # Instantané de la config DB (champs par guard_type + données dérivées), relu après une
+        # écriture de config dans ce processus ou au bout de CONFIG_SNAPSHOT_TTL (autres workers)
+        self._config_snapshot = {'version': None, 'loaded_at': 0.0, 'fields': {}, 'regex_plans': {}, 'ner_fields': {}}
+
+        # Pool réutilisé entre appels : CamemBERT / BERT (code natif, GIL relâché) tournent
+        # en parallèle de la phase regex + Presidio
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pii-models")
+
+        # Presidio (multi-lang si possible) initialisé paresseusement au premier usage
+        self._presidio_analyzer = None
+        self._presidio_loaded = False
+        self._presidio_lock = threading.Lock()
+        self._presidio_langs: List[str] = []
+        if not PRESIDIO_AVAILABLE:
             print("ℹ️ Presidio non disponible (package non installé).")
 
+    @property
+    def models(self) -> NLPModels:
+        """Modèles NLP (chacun chargé au premier accès à son attribut)."""
+        if self._models is None:
+            with self._models_lock:
+                if self._models is None:
+                    self._models = NLPModels()
+        return self._models
+
+    def _resolve_model_passes(self) -> tuple:
+        if self._model_passes is None:
+            models = self.models
+            with self._models_lock:
+                if self._model_passes is None:
+                    # Passe BERT sautée si CamemBERT est disponible (sauf PII_USE_BERT_FALLBACK=1) :
+                    # BERT n'est alors jamais chargé
+                    bert_active = (USE_BERT_FALLBACK or not models.camembert_model) and bool(models.bert_model)
+                    fallback_fns = (self._detect_with_camembert, self._detect_with_bert) if bert_active \
+                        else (self._detect_with_camembert,)
+                    print(f"📋 Modèles disponibles : {', '.join(models.get_available_models())}")
+                    self._model_passes = (bert_active, fallback_fns)
+        return self._model_passes
+
+    @property
+    def _bert_active(self) -> bool:
+        return self._resolve_model_passes()[0]
+
+    @property
+    def _fallback_model_fns(self) -> tuple:
+        """Détecteurs transformers de repli (CamemBERT, + BERT si actif)."""
+        return self._resolve_model_passes()[1]
+
+    def preload(self):
+        """Charge immédiatement les modèles utilisés et Presidio (préchauffage au démarrage)."""
+        return self._resolve_model_passes(), self.presidio_analyzer
+
+    @property
+    def presidio_analyzer(self):
+        """AnalyzerEngine Presidio, créé au premier accès (None si indisponible)."""
+        if not self._presidio_loaded and PRESIDIO_AVAILABLE:
+            with self._presidio_lock:
+                if not self._presidio_loaded:
+                    self._init_presidio()
+                    self._presidio_loaded = True
+        return self._presidio_analyzer
+
     def _init_presidio(self):
         """Initialise Presidio avec fr + fallback en si disponible."""
         try:
-            # Essayer de charger les modèles spaCy nécessaires
+            # Charger les modèles spaCy nécessaires (le modèle fr de NLPModels est réutilisé tel quel)
             import spacy
             available_models = []
+            loaded = {}
             # Langues souhaitées via variable d'environnement (ex: PII_PRESIDIO_LANGS=fr ou fr,en)
             langs_env = os.getenv("PII_PRESIDIO_LANGS", "fr,en")
             wanted_langs = [l.strip() for l in langs_env.split(',') if l.strip()]
@@ -55,8 +436,13 @@ class PIIDetectorFrench:
                 model_name = model_map.get(code)
                 if not model_name:
                     continue
+                shared = self.models.spacy_model
+                if shared is not None and shared.meta.get('lang') == code and shared.meta.get('name') == model_name.split('_', 1)[1]:
+                    loaded[code] = shared
+                    available_models.append({"lang_code": code, "model_name": model_name})
+                    continue
                 try:
-                    spacy.load(model_name)
+                    loaded[code] = spacy.load(model_name, disable=_SPACY_UNUSED_FOR_NER)
                     available_models.append({"lang_code": code, "model_name": model_name})
                 except Exception:
                     # Tentative de téléchargement automatique (utile en dev / container frais)
@@ -64,48 +450,175 @@ class PIIDetectorFrench:
                         from spacy.cli import download as spacy_download
                         print(f"⬇️ Téléchargement modèle spaCy manquant: {model_name}")
                         spacy_download(model_name)
-                        spacy.load(model_name)
+                        loaded[code] = spacy.load(model_name, disable=_SPACY_UNUSED_FOR_NER)
                         available_models.append({"lang_code": code, "model_name": model_name})
                     except Exception:
                         print(f"⚠️ Modèle spaCy {model_name} indisponible (lang {code}), ignoré.")
             if not available_models:
                 raise RuntimeError("Aucun modèle spaCy fr/en disponible pour Presidio")
-            configuration = {"nlp_engine_name": "spacy", "models": available_models}
-            provider = NlpEngineProvider(nlp_configuration=configuration)
-            nlp_engine = provider.create_engine()
-            self.presidio_analyzer = AnalyzerEngine(nlp_engine=nlp_engine)
+            nlp_engine = _SharedSpacyNlpEngine(loaded, available_models)
+            langs = [m['lang_code'] for m in available_models]
+            # Uniquement les recognizers produisant des entités exploitées ici (canoniques + mapping
+            # Presidio) : chaque analyze() n'exécute plus la trentaine de recognizers par défaut
+            registry = RecognizerRegistry(supported_languages=langs)
+            registry.load_predefined_recognizers(languages=langs, nlp_engine=nlp_engine)
+            registry.recognizers = [
+                r for r in registry.recognizers if PRESIDIO_WANTED_ENTITIES.intersection(r.supported_entities)
+            ]
+            self._presidio_analyzer = AnalyzerEngine(
+                registry=registry, nlp_engine=nlp_engine, supported_languages=langs
+            )
+            # Ordre d'essai des langues, fixé une fois (fr d'abord, en en repli s'il est chargé)
+            self._presidio_langs = langs
             supported = []
             try:
-                supported = self.presidio_analyzer.get_supported_entities()
+                supported = self._presidio_analyzer.get_supported_entities()
             except Exception:
                 pass
             print(f"✅ Presidio initialisé. Langues: {[m['lang_code'] for m in available_models]} | Entités supportées: {supported}")
         except Exception as e:
             self.presidio_init_error = str(e)
-            self.presidio_analyzer = None
+            self._presidio_analyzer = None
             print(f"⚠️ Échec initialisation Presidio: {e}")
     
     def detect(self, text: str, guard_type: str = None) -> List[Dict]:
         """Détection intelligente : privilégie les patterns regex personnalisés."""
+        key = self._detect_cache_key(text, guard_type)
+        cached = self._detect_cache_get(key)
+        if cached is not None:
+            return cached
+        result = self._detect_one(text, guard_type)
+        self._detect_cache_put(key, result)
+        return result
+
+    def _detect_cache_key(self, text: str, guard_type: str = None) -> tuple:
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        return (guard_type, digest, getattr(self.config_loader.db, 'config_version', 0))
+
+    def _detect_cache_get(self, key: tuple):
+        """Copie des entités en cache (None si absent ou expiré)."""
+        if DETECT_CACHE_SIZE <= 0:
+            return None
+        with self._detect_cache_lock:
+            entry = self._detect_cache.get(key)
+            if entry is None:
+                return None
+            stored_at, entities = entry
+            if time.monotonic() - stored_at > DETECT_CACHE_TTL:
+                del self._detect_cache[key]
+                return None
+            self._detect_cache.move_to_end(key)
+        return [dict(e) for e in entities]
+
+    def _detect_cache_put(self, key: tuple, entities: List[Dict]):
+        if DETECT_CACHE_SIZE <= 0:
+            return
+        frozen = tuple(dict(e) for e in entities)
+        with self._detect_cache_lock:
+            self._detect_cache[key] = (time.monotonic(), frozen)
+            self._detect_cache.move_to_end(key)
+            while len(self._detect_cache) > DETECT_CACHE_SIZE:
+                self._detect_cache.popitem(last=False)
+
+    def detect_many(self, texts: List[str], guard_type: str = None, batch_size: int = 32) -> List[List[Dict]]:
+        """Détection sur plusieurs textes : les modèles transformers (CamemBERT / BERT) sont
+        appelés une seule fois en batch au lieu d'une inférence par texte."""
+        if not texts:
+            return []
+        keys = [self._detect_cache_key(text, guard_type) for text in texts]
+        results = [self._detect_cache_get(key) for key in keys]
+        pending = [i for i, r in enumerate(results) if r is None]
+        if not pending:
+            return results
+        todo = [texts[i] for i in pending]
+        # Regex d'abord pour chaque texte : les modèles reçoivent le même texte masqué que detect()
+        regex_results = [self._detect_with_regex(text, guard_type) for text in todo]
+        model_results = None
+        try:
+            has_ner_fields = bool(self._model_fillable_types(guard_type))
+        except Exception as e:
+            logging.warning(f"⚠️ Lecture champs NER échouée: {e}")
+            has_ner_fields = False
+        if has_ner_fields:
+            # Textes déjà largement couverts par les regex : pas d'inférence (liste vide)
+            model_results = [[] for _ in todo]
+            infer = [j for j, (text, regex) in enumerate(zip(todo, regex_results))
+                     if not self._regex_covers_text(text, regex)]
+            if infer:
+                ner_texts = [self._mask_covered_spans(todo[j], regex_results[j]) for j in infer]
+                cam_batches = self._detect_with_camembert_many(ner_texts, batch_size)
+                bert_batches = self._detect_with_bert_many(ner_texts, batch_size)
+                for j, cam, bert in zip(infer, cam_batches, bert_batches):
+                    model_results[j] = cam + bert
+        for j, i in enumerate(pending):
+            results[i] = self._detect_one(texts[i], guard_type,
+                                          model_results[j] if model_results is not None else None,
+                                          regex_results[j])
+            self._detect_cache_put(keys[i], results[i])
+        return results
+
+    def _detect_one(self, text: str, guard_type: str = None, model_results: List[Dict] = None,
+                    regex_entities: List[Dict] = None) -> List[Dict]:
         entities = []
-        regex_covered_text = set()
-        logging.info(f"🔍 DÉBUT DÉTECTION pour: '{text[:100]}...' (guard_type: {guard_type})")
+        logger.debug("🔍 DÉBUT DÉTECTION pour: '%.100s...' (guard_type: %s)", text, guard_type)
+        if not self._has_detection_fields(guard_type):
+            logger.debug("⏭️ Aucun champ regex ni NER configuré pour %s, détection sautée", guard_type or 'tous')
+            return entities
 
-        # 1. Regex DB
-        regex_entities = self._detect_with_regex(text, guard_type)
+        # 1. Regex DB (déjà calculées par detect_many le cas échéant)
+        if regex_entities is None:
+            regex_entities = self._detect_with_regex(text, guard_type)
         entities.extend(regex_entities)
-        regex_covered_text.update(e['text'] for e in regex_entities)
+        regex_spans = _span_index(regex_entities)
 
-        # 2. NER configuré
-        ner_entities = self._detect_with_ner_for_configured_fields(text, regex_covered_text, guard_type)
+        # Texte pour les modèles NER : zones déjà couvertes par les regex remplacées par des espaces
+        # (même longueur, offsets inchangés), sauf si le masquage retirerait trop de contexte
+        ner_text = self._mask_covered_spans(text, regex_entities)
+
+        # 2. Modèles transformers lancés en tâche de fond pendant l'analyse Presidio (sautés si les
+        #    regex couvrent déjà l'essentiel du texte ou si aucun champ NER configuré n'est complétable)
+        model_futures = None
+        fillable = frozenset()
+        if model_results is None and not self._regex_covers_text(text, regex_entities):
+            try:
+                fillable = self._model_fillable_types(guard_type)
+            except Exception as e:
+                logging.warning(f"⚠️ Lecture champs NER échouée: {e}")
+            if fillable and not FALLBACK_ONLY_MISSING:
+                model_futures = [self._executor.submit(fn, ner_text) for fn in self._fallback_model_fns]
+
+        # 3. NER configuré
+        ner_entities = self._detect_with_ner_for_configured_fields(ner_text, regex_spans, guard_type)
         entities.extend(ner_entities)
 
-        # 3. Fallback models
-        fallback_added = self._augment_with_fallback_models(text, ner_entities, guard_type)
+        only_types = None
+        if fillable and FALLBACK_ONLY_MISSING:
+            # Modèles lancés après Presidio, seulement pour les entités qu'il n'a pas trouvées
+            only_types = fillable.difference(e.get('presidio_type') for e in ner_entities)
+            if only_types:
+                model_futures = [self._executor.submit(fn, ner_text) for fn in self._fallback_model_fns]
+
+        # 4. Fallback models (liste vide si sautés : _augment_with_fallback_models ne les relance pas)
+        if model_futures is not None:
+            model_results = []
+            for fut in model_futures:
+                try:
+                    model_results.extend(fut.result())
+                except Exception as e:
+                    logging.warning(f"⚠️ Modèle fallback erreur: {e}")
+        elif model_results is None:
+            model_results = []
+        if ner_text is not text:
+            # Textes relus dans l'original (les offsets sont identiques)
+            for e in ner_entities:
+                e['text'] = text[e['start']:e['end']]
+            for e in model_results or ():
+                e['text'] = text[e['start']:e['end']]
+        fallback_added = self._augment_with_fallback_models(text, ner_entities, guard_type, model_results, only_types)
         if fallback_added:
             entities.extend(fallback_added)
 
-        # 3bis. Heuristique supplémentaire pour noms simples non capitalisés ("je m'appelle josh")
+        # 4bis. Heuristique supplémentaire pour noms simples non capitalisés ("je m'appelle josh")
         try:
             heuristic_new = self._heuristic_name_entities(text, guard_type, existing=entities)
             if heuristic_new:
@@ -113,13 +626,22 @@ class PIIDetectorFrench:
         except Exception as e:
             logging.debug(f"Heuristique nom erreur: {e}")
 
-        # Validation
-        validated = self._validate_entities(entities)
+        # Validation : 'text' / 'type' sont toujours posés par nos détecteurs, seul le texte vide est écarté
+        validated = [e for e in entities if e['text'].strip()]
         filtered = filter_false_positives(validated) if not self.high_recall_person else validated
 
-        regex_part = [e for e in filtered if e.get('source') == 'regex_db']
-        other_part = [e for e in filtered if e.get('source') != 'regex_db']
-        merged_other = self._merge_entities(other_part)
+        # Séparation regex DB / autres sources en une seule passe ; les doublons exacts (start, end, type)
+        # des autres sources (ex: même nom vu par CamemBERT et BERT) réduits au meilleur score avant fusion
+        regex_part, other_by_key = [], {}
+        for e in filtered:
+            if e.get('source') == 'regex_db':
+                regex_part.append(e)
+                continue
+            key = (e['start'], e['end'], e['type'])
+            kept = other_by_key.get(key)
+            if kept is None or e.get('confidence', 0) > kept.get('confidence', 0):
+                other_by_key[key] = e
+        merged_other = self._merge_entities(list(other_by_key.values()), text)
         final_entities = regex_part + merged_other
         # Unification (optionnelle via env PII_UNIFY_DOCS=0 pour désactiver)
         if os.getenv('PII_UNIFY_DOCS', '1') != '0':
@@ -128,21 +650,123 @@ class PIIDetectorFrench:
         final_entities = self._post_process_incoherences(final_entities, text)
         return final_entities
 
-    def _augment_with_fallback_models(self, text: str, existing_ner: List[Dict], guard_type: str = None) -> List[Dict]:
+    def _regex_covers_text(self, text: str, spans: List[Dict]) -> bool:
+        """Vrai si les spans regex couvrent au moins EARLY_EXIT_COVERAGE du texte et que le reste
+        ne contient aucune lettre (rien que les modèles NER puissent encore y trouver)."""
+        if EARLY_EXIT_COVERAGE > 1.0 or not spans or not text:
+            return False
+        mask = bytearray(len(text))
+        for e in spans:
+            start, end = e['start'], min(e['end'], len(text))
+            if end > start:
+                mask[start:end] = b'\x01' * (end - start)
+        if mask.count(1) / len(text) < EARLY_EXIT_COVERAGE:
+            return False
+        return not any(c.isalpha() for c, covered in zip(text, mask) if not covered)
+
+    def _mask_covered_spans(self, text: str, covered: List[Dict]) -> str:
+        """Remplace les zones déjà détectées par des espaces de même longueur.
+
+        Retourne le texte d'origine si rien n'est couvert ou si la part masquée dépasse
+        PII_NER_MASK_MAX_RATIO (0.5 par défaut), pour préserver le contexte des modèles NER.
+        """
+        if not covered or not text:
+            return text
+        chars = list(text)
+        masked = 0
+        for e in covered:
+            for i in range(e['start'], min(e['end'], len(chars))):
+                if chars[i] != ' ':
+                    chars[i] = ' '
+                    masked += 1
+        if masked == 0 or masked / len(text) > NER_MASK_MAX_RATIO:
+            return text
+        return ''.join(chars)
+
+    def _current_config_snapshot(self) -> Dict:
+        """Instantané de config courant, renouvelé si la version a changé ou si le TTL est dépassé."""
+        snapshot = self._config_snapshot
+        version = getattr(self.config_loader.db, 'config_version', 0)
+        now = time.monotonic()
+        if snapshot['version'] != version or now - snapshot['loaded_at'] > CONFIG_SNAPSHOT_TTL:
+            snapshot = {'version': version, 'loaded_at': now, 'fields': {}, 'regex_plans': {}, 'ner_fields': {}}
+            self._config_snapshot = snapshot
+        return snapshot
+
+    def _config_fields(self, target_guard_type: str = None) -> List[tuple]:
+        """[(guard_type, champs PII)] pour un guard_type (ou tous), lus en base une fois par instantané."""
+        fields = self._current_config_snapshot()['fields']
+        entries = fields.get(target_guard_type)
+        if entries is None:
+            if target_guard_type:
+                entries = [(target_guard_type, self.config_loader.db.get_pii_fields(target_guard_type))]
+            else:
+                # Tous les types : une seule requête jointe au lieu d'un get_pii_fields par type
+                entries = [(g['name'], g['fields']) for g in self.config_loader.db.get_all_guard_types_with_fields()]
+            # Noms de champ (futurs types d'entité) et types de détection internés une fois par
+            # instantané : les comparaisons avec les littéraux du code ('cvv', 'name', 'regex'...) se
+            # résolvent par identité
+            for _, pii_fields in entries:
+                for field in pii_fields:
+                    for key in ('field_name', 'detection_type'):
+                        if isinstance(field.get(key), str):
+                            field[key] = sys.intern(field[key])
+            fields[target_guard_type] = entries
+        return entries
+
+    def _has_detection_fields(self, guard_type: str = None) -> bool:
+        """Faux si aucun champ regex valide ni champ NER n'est configuré : aucune étape ne peut alors
+        produire d'entité (regex, Presidio, modèles et heuristique dépendent tous de la config)."""
+        try:
+            return bool(self._regex_plan(guard_type)[0] or self._ner_fields(guard_type))
+        except Exception as e:
+            logging.warning(f"⚠️ Lecture config détection échouée: {e}")
+            return True
+
+    def _model_fillable_types(self, guard_type: str = None) -> frozenset:
+        """Entités NER configurées que CamemBERT / BERT peuvent compléter (vide : inutile de les lancer)."""
+        return _MODEL_FILLABLE_TYPES.intersection(self._configured_ner_fields(guard_type))
+
+    def _configured_ner_fields(self, guard_type: str = None) -> Dict[str, Dict]:
+        """Champs configurés en NER, indexés par type d'entité (majuscules)."""
+        return self._ner_config(guard_type)[1]
+
+    def _ner_fields(self, guard_type: str = None) -> List[Dict]:
+        """Champs NER (avec leur type Presidio canonique) dans l'ordre de configuration."""
+        return self._ner_config(guard_type)[0]
+
+    def _ner_config(self, guard_type: str = None) -> tuple:
+        """(liste des champs NER, champs par type d'entité), calculés une fois par instantané de config."""
+        cache = self._current_config_snapshot()['ner_fields']
+        cached = cache.get(guard_type)
+        if cached is not None:
+            return cached
+        ner_fields, by_type = [], {}
+        for guard_name, pii_fields in self._config_fields(guard_type):
+            for f in pii_fields:
+                if f['detection_type'] == 'ner' and f['ner_entity_type']:
+                    raw_type = f['ner_entity_type'].upper()
+                    by_type[raw_type] = f
+                    ner_fields.append({
+                        'field_name': f['field_name'],
+                        'ner_entity_type': f['ner_entity_type'],
+                        'presidio_type': self.entity_mapping.get(raw_type, raw_type),
+                        'guard_type': guard_name,
+                        'confidence_threshold': f.get('confidence_threshold', 0.7)
+                    })
+        cache[guard_type] = (ner_fields, by_type)
+        return cache[guard_type]
+
+    def _augment_with_fallback_models(self, text: str, existing_ner: List[Dict], guard_type: str = None,
+                                      model_results: List[Dict] = None, only_types: frozenset = None) -> List[Dict]:
         """Ajoute des entités NER issues des modèles internes (Camembert / BERT) UNIQUEMENT
         si elles correspondent à des champs configurés en NER non encore détectés par Presidio.
+        `model_results` permet de fournir des résultats déjà calculés en batch (detect_many),
+        `only_types` de restreindre aux entités canoniques encore manquantes.
         """
         try:
             # Champs NER configurés
-            if guard_type:
-                guard_types = [{'name': guard_type}]
-            else:
-                guard_types = self.config_loader.db.get_guard_types()
-            configured = {}
-            for gt in guard_types:
-                for f in self.config_loader.db.get_pii_fields(gt['name']):
-                    if f['detection_type'] == 'ner' and f['ner_entity_type']:
-                        configured[f['ner_entity_type'].upper()] = f
+            configured = self._configured_ner_fields(guard_type)
 
             if not configured:
                 return []
@@ -151,33 +775,30 @@ class PIIDetectorFrench:
 
             additions = []
 
-            # Utiliser Camembert
-            try:
-                cam_results = self._detect_with_camembert(text)
-            except Exception:
-                cam_results = []
-            # Utiliser BERT
-            try:
-                bert_results = self._detect_with_bert(text)
-            except Exception:
-                bert_results = []
+            if model_results is None:
+                # Camembert / BERT en parallèle sur le pool partagé (GIL relâché pendant l'inférence)
+                futures = [self._executor.submit(fn, text) for fn in self._fallback_model_fns]
+                model_results = []
+                for fut in futures:
+                    try:
+                        model_results.extend(fut.result())
+                    except Exception:
+                        pass
 
-            combined = cam_results + bert_results
+            combined = model_results
             if not combined:
                 return []
 
             # Mapping simplifié: on mappe les types application (name, company, address...) vers entités configurées sémantiquement proches
-            semantic_map = {
-                'name': 'PERSON', 'company': 'ORGANIZATION', 'address': 'LOCATION', 'birth_date': 'DATE_TIME'
-            }
-
             for res in combined:
                 app_type = res.get('type')
-                canonical = semantic_map.get(app_type)
+                canonical = _FALLBACK_SEMANTIC_MAP.get(app_type)
                 if not canonical:
                     continue
                 if canonical not in configured:
                     continue
+                if only_types is not None and canonical not in only_types:
+                    continue
                 field_conf = configured[canonical]
                 key = (res['text'], field_conf['field_name'])
                 if key in already_texts:
@@ -197,90 +818,75 @@ class PIIDetectorFrench:
             logging.warning(f"⚠️ Fallback NER erreur: {e}")
             return []
 
-    def _detect_with_ner_for_configured_fields(self, text: str, regex_covered_text: set, target_guard_type: str = None) -> List[Dict]:
+    def _detect_with_ner_for_configured_fields(self, text: str, regex_spans: tuple, target_guard_type: str = None) -> List[Dict]:
         """Détecte uniquement les champs configurés avec detection_type='ner'."""
         entities = []
         
         try:
-            if target_guard_type:
-                # Récupérer les champs NER pour un guard_type spécifique
-                guard_types = [{'name': target_guard_type}]
-                logging.info(f"🎯 Détection NER pour guard_type spécifique: {target_guard_type}")
-            else:
-                # Récupérer les champs NER pour tous les guard_types
-                guard_types = self.config_loader.db.get_guard_types()
-                logging.info(f"🌍 Détection NER pour tous les guard_types: {len(guard_types)}")
-            
-            ner_fields = []
-            
-            for guard_type in guard_types:
-                pii_fields = self.config_loader.db.get_pii_fields(guard_type['name'])
-                for field in pii_fields:
-                    if field['detection_type'] == 'ner' and field['ner_entity_type']:
-                        ner_fields.append({
-                            'field_name': field['field_name'],
-                            'ner_entity_type': field['ner_entity_type'],
-                            'guard_type': guard_type['name'],
-                            'confidence_threshold': field.get('confidence_threshold', 0.7)
-                        })
+            logger.debug("🎯 Détection NER pour guard_type: %s", target_guard_type or 'tous')
+            ner_fields = self._ner_fields(target_guard_type)
             
             if not ner_fields:
-                print("🤖 Aucun champ NER configuré, pas de détection NER")
+                logger.debug("🤖 Aucun champ NER configuré, pas de détection NER")
                 return entities
             
-            print(f"🤖 Champs NER configurés: {[f['field_name'] + ':' + f['ner_entity_type'] for f in ner_fields]}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"🤖 Champs NER configurés: {[f['field_name'] + ':' + f['ner_entity_type'] for f in ner_fields]}")
             
             # Utiliser Presidio pour détecter chaque entité configurée (multi-lang fallback)
             if self.presidio_analyzer:
-                # Déterminer les langues chargées dans l'engine spaCy
-                try:
-                    loaded_langs = list(getattr(self.presidio_analyzer.nlp_engine, 'nlp', {}).keys())
-                    if not loaded_langs:
-                        loaded_langs = ['fr']
-                except Exception:
-                    loaded_langs = ['fr']
-                # Ajouter 'en' comme fallback si absent (souvent utile pour EMAIL_ADDRESS / CREDIT_CARD)
-                if 'en' not in loaded_langs:
-                    loaded_langs.append('en')
-                logging.info(f"🌐 Langues NER disponibles/fallback: {loaded_langs}")
-
-                for field in ner_fields:
-                    raw_type = field['ner_entity_type'] or ''
-                    presidio_type = self.entity_mapping.get(raw_type.upper(), raw_type.upper())
-                    logging.info(f"🔄 Champ '{field['field_name']}' type interface '{raw_type}' → canonique '{presidio_type}'")
-                    found = False
-                    for lang in loaded_langs:
-                        try:
-                            # Analyse ciblée
-                            results = self.presidio_analyzer.analyze(text=text, language=lang, entities=[presidio_type])
-                            logging.info(f"🧪 Résultats {presidio_type} ({lang}): {[(r.entity_type, text[r.start:r.end], round(r.score,3)) for r in results]}")
-                            for result in results:
-                                if result.entity_type != presidio_type:
-                                    continue
-                                detected_text = text[result.start:result.end]
-                                if detected_text in regex_covered_text:
-                                    logging.info(f"⏭️ Ignoré regex: {detected_text}")
-                                    continue
-                                # Seuil de confiance supprimé : on accepte tous les résultats retournés par l'analyseur
-                                # Ancien filtre basé sur field['confidence_threshold'] retiré.
-                                entities.append({
-                                    'text': detected_text,
-                                    'type': field['field_name'],
-                                    'start': result.start,
-                                    'end': result.end,
-                                    'source': f'ner_configured_{lang}',
-                                    'confidence': result.score,
-                                    'presidio_type': result.entity_type,
-                                    'guard_type': field['guard_type']
-                                })
-                                print(f"🎯 NER trouvé ({lang}): '{detected_text}' → {field['field_name']} [{presidio_type}] score={result.score:.2f}")
-                                found = True
-                            if found:
-                                break
-                        except Exception as e:
-                            logging.warning(f"❌ Erreur analyse {presidio_type} ({lang}): {e}")
-                    if not found:
-                        logging.warning(f"⚠️ Aucune détection pour '{presidio_type}' (champ '{field['field_name']}') sur langues {loaded_langs}")
+                loaded_langs = self._presidio_langs
+                logger.debug("🌐 Langues NER disponibles/fallback: %s", loaded_langs)
+
+                # Un seul analyze() par langue pour tous les types encore sans résultat (au lieu d'un
+                # par champ × langue) ; chaque type garde les résultats de la première langue qui en donne
+                field_types = [(field, field['presidio_type']) for field in ner_fields]
+                pending = list(dict.fromkeys(t for _, t in field_types))
+                hits_by_type = {}
+                for lang in loaded_langs:
+                    if not pending:
+                        break
+                    try:
+                        results = self.presidio_analyzer.analyze(text=text, language=lang, entities=pending)
+                    except Exception as e:
+                        logging.warning(f"❌ Erreur analyse {pending} ({lang}): {e}")
+                        continue
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("🧪 Résultats %s (%s): %s", pending, lang,
+                                     [(r.entity_type, text[r.start:r.end], round(r.score, 3)) for r in results])
+                    by_type = {}
+                    for result in results:
+                        if _span_overlaps(regex_spans, result.start, result.end):
+                            logger.debug("⏭️ Ignoré regex: %s", text[result.start:result.end])
+                            continue
+                        by_type.setdefault(result.entity_type, []).append(result)
+                    for presidio_type in pending:
+                        if presidio_type in by_type:
+                            hits_by_type[presidio_type] = (lang, by_type[presidio_type])
+                    pending = [t for t in pending if t not in hits_by_type]
+
+                for field, presidio_type in field_types:
+                    hit = hits_by_type.get(presidio_type)
+                    if hit is None:
+                        logger.debug("⚠️ Aucune détection pour '%s' (champ '%s') sur langues %s", presidio_type, field['field_name'], loaded_langs)
+                        continue
+                    lang, results = hit
+                    for result in results:
+                        detected_text = text[result.start:result.end]
+                        # Seuil de confiance supprimé : on accepte tous les résultats retournés par l'analyseur
+                        # Ancien filtre basé sur field['confidence_threshold'] retiré.
+                        entities.append({
+                            'text': detected_text,
+                            'type': field['field_name'],
+                            'start': result.start,
+                            'end': result.end,
+                            'source': f'ner_configured_{lang}',
+                            'confidence': result.score,
+                            'presidio_type': result.entity_type,
+                            'guard_type': field['guard_type']
+                        })
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug(f"🎯 NER trouvé ({lang}): '{detected_text}' → {field['field_name']} [{presidio_type}] score={result.score:.2f}")
             else:
                 logging.warning("⚠️ Presidio inactif – fallback partiel regex pour certains types NER (EMAIL_ADDRESS, PHONE_NUMBER)")
                 # Fallback minimal pour EMAIL_ADDRESS si utilisateur a créé un champ NER mais Presidio absent
@@ -290,7 +896,7 @@ class PIIDetectorFrench:
                     email_pattern = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
                     for match in email_pattern.finditer(text):
                         val = match.group(0)
-                        if val in regex_covered_text:
+                        if _span_overlaps(regex_spans, match.start(), match.end()):
                             continue
                         for field in email_like:
                             entities.append({
@@ -303,258 +909,188 @@ class PIIDetectorFrench:
                                 'presidio_type': 'EMAIL_ADDRESS',
                                 'guard_type': field['guard_type']
                             })
-                            print(f"🔁 Fallback EMAIL_ADDRESS regex → {val}")
+                            if logger.isEnabledFor(logging.DEBUG):
+                                logger.debug(f"🔁 Fallback EMAIL_ADDRESS regex → {val}")
         
         except Exception as e:
-            print(f"⚠️ Erreur détection NER configurée: {e}")
+            logger.warning(f"⚠️ Erreur détection NER configurée: {e}")
         
         return entities
 
     def _detect_with_camembert(self, text: str) -> List[Dict]:
         """Détecte les entités avec CamemBERT français."""
-        try:
-            if not getattr(self.models, 'camembert_model', None):
-                return []
-            results = self.models.camembert_model(text)
-            print(f"CamemBERT détecté : {len(results)} entités")
-            
-            entities = []
-            for res in results:
-                if 'word' in res and 'entity_group' in res and 'start' in res and 'end' in res:
-                    entity_type = self._map_camembert_type(res['entity_group'])
-                    if entity_type != "unknown":
-                        entities.append({
-                            "text": res['word'],
-                            "type": entity_type,
-                            "start": res['start'],
-                            "end": res['end'],
-                            "source": "camembert",
-                            "confidence": res.get('score', 0.0)
-                        })
-            return entities
-        except Exception as e:
-            print(f"Erreur CamemBERT : {e}")
-            return []
+        return self._detect_with_camembert_many([text])[0]
 
-    def _detect_with_french_model(self, text: str) -> List[Dict]:
-        """Détecte les entités avec le modèle français alternatif."""
-        try:
-            results = self.models.french_model(text)
-            print(f"Modèle français alternatif détecté : {len(results)} entités")
-            
-            entities = []
+    @_safe_detector("CamemBERT", batched=True)
+    def _detect_with_camembert_many(self, texts: List[str], batch_size: int = 32) -> List[List[Dict]]:
+        """CamemBERT sur plusieurs textes en un seul appel batché du pipeline."""
+        if not getattr(self.models, 'camembert_model', None):
+            return [[] for _ in texts]
+        batches = self.models.camembert_model(texts, batch_size=batch_size)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"CamemBERT détecté : {sum(len(r) for r in batches)} entités ({len(texts)} textes)")
+
+        out = []
+        for text, results in zip(texts, batches):
+            # Offsets (start, end, type, score) d'abord, textes relus dans l'original en une passe
+            # (res['word'] recolle les sous-mots et peut différer du texte source)
+            items = []
             for res in results:
-                if 'word' in res and 'entity_group' in res and 'start' in res and 'end' in res:
-                    entity_type = self._map_french_type(res['entity_group'])
+                if 'entity_group' in res and 'start' in res and 'end' in res:
+                    entity_type = _CAMEMBERT_TYPE_MAP.get(res['entity_group'], "unknown")
                     if entity_type != "unknown":
-                        entities.append({
-                            "text": res['word'],
-                            "type": entity_type,
-                            "start": res['start'],
-                            "end": res['end'],
-                            "source": "french_model",
-                            "confidence": res.get('score', 0.0)
-                        })
-            return entities
-        except Exception as e:
-            print(f"Erreur modèle français : {e}")
-            return []
-
-    def _map_camembert_type(self, entity_group: str) -> str:
-        """Mappe les types CamemBERT vers nos types d'application."""
-        mapping = {
-            "PER": "name",        # Personne
-            "PERS": "name",       # Variante personne
-            "LOC": "address",     # Lieu
-            "ORG": "company",     # Organisation
-            "MISC": "unknown"     # Divers
-        }
-        return mapping.get(entity_group, "unknown")
-
-    def _map_french_type(self, entity_group: str) -> str:
-        """Mappe les types du modèle français vers nos types d'application."""
-        mapping = {
-            "PER": "name",
-            "LOC": "address",
-            "ORG": "company",
-            "MISC": "unknown"
-        }
-        return mapping.get(entity_group, "unknown")
+                        items.append((res['start'], res['end'], entity_type, res.get('score', 0.0)))
+            out.append([
+                {"text": text[s:e], "type": t, "start": s, "end": e, "source": "camembert", "confidence": sc}
+                for s, e, t, sc in items
+            ])
+        return out
 
+    @_safe_detector("Presidio")
     def _detect_with_presidio(self, text: str) -> List[Dict]:
         """Détecte les entités PII avec Microsoft Presidio."""
         if not self.presidio_analyzer:
             return []
             
-        try:
-            # Analyse avec Presidio en français
-            results = self.presidio_analyzer.analyze(text=text, language="fr")
-            
-            entities = []
-            for result in results:
-                entity_text = text[result.start:result.end]
-                entity_type = self._map_presidio_type(result.entity_type)
-                
-                if entity_type != "unknown":
-                    entities.append({
-                        "text": entity_text,
-                        "type": entity_type,
-                        "start": result.start,
-                        "end": result.end,
-                        "source": "presidio",
-                        "confidence": result.score
-                    })
-            
-            print(f"Presidio détecté {len(entities)} entités")
-            return entities
-            
-        except Exception as e:
-            print(f"Erreur Presidio : {e}")
-            return []
+        # Analyse avec Presidio en français
+        results = self.presidio_analyzer.analyze(text=text, language="fr", entities=list(_PRESIDIO_TYPE_MAP))
+
+        items = [
+            (r.start, r.end, _PRESIDIO_TYPE_MAP.get(r.entity_type, "unknown"), r.score) for r in results
+        ]
+        entities = [
+            {"text": text[s:e], "type": t, "start": s, "end": e, "source": "presidio", "confidence": sc}
+            for s, e, t, sc in items if t != "unknown"
+        ]
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Presidio détecté {len(entities)} entités")
+        return entities
+
+    def _regex_plan(self, target_guard_type: str = None) -> tuple:
+        """Champs regex DB avec leur pattern compilé (+ pré-filtre RE2 et ancres), mis en cache par (guard_type, version de config)."""
+        regex_plans = self._current_config_snapshot()['regex_plans']
+        cached = regex_plans.get(target_guard_type)
+        if cached is not None:
+            return cached
 
-    def _map_presidio_type(self, presidio_type: str) -> str:
-        """Mappe les types Presidio vers nos types d'application."""
-        mapping = {
-            "PERSON": "name",
-            "EMAIL_ADDRESS": "email",
-            "PHONE_NUMBER": "phone",
-            "CREDIT_CARD": "credit_card",
-            "IBAN_CODE": "iban",
-            "DATE_TIME": "birth_date",
-            "LOCATION": "address",
-            "IP_ADDRESS": "ip_address",
-            "SSN": "social_security",
-            "PASSPORT": "passport",
-            "ORGANIZATION": "company"
-        }
-        return mapping.get(presidio_type, "unknown")
+        plan = []
+        for guard_name, pii_fields in self._config_fields(target_guard_type):
+            for field in pii_fields:
+                if field['detection_type'] != 'regex' or not field['pattern']:
+                    continue
+                try:
+                    compiled_pattern = _compile_db_pattern(field['pattern'])
+                except re.error as e:
+                    logger.warning(f"⚠️ Pattern regex invalide '{field['field_name']}': {e}")
+                    continue
+                plan.append((guard_name, field, compiled_pattern))
+        prefilter = _build_re2_prefilter([field['pattern'] for _, field, _ in plan]) if len(plan) > 1 else None
+        anchors = [_pattern_anchors(field['pattern']) for _, field, _ in plan]
+        regex_plans[target_guard_type] = (plan, prefilter, anchors)
+        return plan, prefilter, anchors
 
     def _detect_with_regex(self, text: str, target_guard_type: str = None) -> List[Dict]:
         """Détection par patterns regex dynamiques depuis la base de données."""
         entities = []
         
         try:
-            if target_guard_type:
-                # Détecter seulement pour un guard_type spécifique
-                guard_types = [{'name': target_guard_type}]
-                logging.info(f"🎯 Détection regex pour guard_type spécifique: {target_guard_type}")
-            else:
-                # Détecter pour tous les guard_types (comportement par défaut)
-                guard_types = self.config_loader.db.get_guard_types()
-                logging.info(f"🌍 Détection regex pour tous les guard_types: {len(guard_types)}")
-            
-            for guard_type in guard_types:
-                pii_fields = self.config_loader.db.get_pii_fields(guard_type['name'])
-                
-                for field in pii_fields:
-                    if field['detection_type'] == 'regex' and field['pattern']:
-                        try:
-                            # Utiliser directement le pattern du champ
-                            pattern_text = field['pattern']
-                            
-                            if not pattern_text:
-                                logging.info(f"⚠️ Pattern vide pour {field['field_name']}")
-                                continue
-                                
-                            logging.info(f"🔍 Test pattern '{pattern_text}' pour champ '{field['field_name']}' sur texte: '{text}'")
-                            
-                            # Compiler le pattern
-                            compiled_pattern = re.compile(pattern_text, re.IGNORECASE)
-                            
-                            # Chercher les correspondances
-                            for match in compiled_pattern.finditer(text):
-                                val = match.group()
-                                s, e = match.start(), match.end()
-                                # Filtrage spécifique CVV pour éviter années / segments de grands nombres
-                                if field['field_name'] == 'cvv':
-                                    # Exclure si entouré par d'autres chiffres (fait partie d'une plus longue séquence)
-                                    if (s > 0 and text[s-1].isdigit()) or (e < len(text) and text[e].isdigit()):
-                                        continue
-                                    # Exclure années plausibles 19xx / 20xx
-                                    if re.fullmatch(r'19\d\d|20\d\d', val):
-                                        continue
-                                    # Exiger contexte lexical (cvv, cvc, code de securite) si pattern très générique
-                                    # Étendre la fenêtre de contexte pour couvrir 'code de sécurité'
-                                    window_start = max(0, s-40)
-                                    context = text[window_start:s].lower()
-                                    # Accepter contextes: cvv, cvc, code de sécurité, sécurité seule
-                                    if not re.search(r'(cvv|cvc|code\s+de\s+s[eé]curit[ée]|s[eé]curit[ée])', context):
-                                        # Si pas de contexte explicite et pattern est juste \d{3,4}, ignorer
-                                        if field['pattern'] == r'\d{3,4}':
-                                            continue
-                                entities.append({
-                                    "text": val,
-                                    "type": field['field_name'],
-                                    "start": s,
-                                    "end": e,
-                                    "source": "regex_db",
-                                    "confidence": 0.9,
-                                    "guard_type": guard_type['name'],
-                                    "field_info": field
-                                })
-                                logging.info(f"🎯 REGEX DB trouvé: '{val}' type: {field['field_name']} dans {guard_type['name']}")
-                                
-                        except re.error as e:
-                            print(f"⚠️ Pattern regex invalide '{field['field_name']}': {e}")
+            plan, prefilter, anchors = self._regex_plan(target_guard_type)
+            if prefilter is not None and text.isascii() and not _RE2_UNSAFE_CHARS.search(text):
+                # Un seul passage DFA pour tous les champs : seuls ceux qui matchent sont rescannés avec re
+                re2_set, set_ids, always = prefilter
+                hit = always.union(set_ids[j] for j in re2_set.Match(text) or ())
+                plan = [entry for i, entry in enumerate(plan) if i in hit]
+            elif any(anchors):
+                # Sinon, patterns dont un caractère obligatoire (@, chiffre...) manque au texte sautés
+                has_digit = _DIGIT_RE.search(text) is not None
+                plan = [entry for entry, anchor in zip(plan, anchors)
+                        if anchor is None or ((has_digit or not anchor[1]) and all(c in text for c in anchor[0]))]
+            for guard_name, field, compiled_pattern in plan:
+                field_name = field['field_name']
+                for match in compiled_pattern.finditer(text):
+                    val = match.group()
+                    s, e = match.start(), match.end()
+                    # Filtrage spécifique CVV pour éviter années / segments de grands nombres
+                    if field_name == 'cvv':
+                        # Exclure si entouré par d'autres chiffres (fait partie d'une plus longue séquence)
+                        if (s > 0 and text[s-1].isdigit()) or (e < len(text) and text[e].isdigit()):
                             continue
+                        # Exclure années plausibles 19xx / 20xx
+                        if _CVV_YEAR_RE.fullmatch(val):
+                            continue
+                        # Exiger contexte lexical (cvv, cvc, code de securite) si pattern très générique
+                        # (\d{3,4} seul) ; fenêtre de 40 caractères pour couvrir 'code de sécurité'.
+                        # Contexte lu uniquement dans ce cas : pour les autres patterns il ne filtre rien
+                        if field['pattern'] == r'\d{3,4}':
+                            # pos/endpos : fenêtre lue en place, sans copie ni passage en minuscules
+                            if not _CVV_CONTEXT_RE.search(text, max(0, s-40), s):
+                                continue
+                    entities.append({
+                        "text": val,
+                        "type": field_name,
+                        "start": s,
+                        "end": e,
+                        "source": "regex_db",
+                        "confidence": 0.9,
+                        "guard_type": guard_name,
+                        "field_info": field
+                    })
+                    logger.debug("🎯 REGEX DB trouvé: '%s' type: %s dans %s", val, field_name, guard_name)
                     
         except Exception as e:
-            print(f"⚠️ Erreur accès champs PII DB: {e}")
+            logger.warning(f"⚠️ Erreur accès champs PII DB: {e}")
             # Fallback vers les patterns statiques
-            for pii_type, pattern in PII_PATTERNS.items():
-                for match in re.finditer(pattern.regex, text):
-                    entities.append({
-                        "text": match.group(),
-                        "type": pii_type,
-                        "start": match.start(),
-                        "end": match.end(),
-                        "source": "regex_static"
-                    })
+            for pii_type, start, end in pii_static_scan(text):
+                entities.append({
+                    "text": text[start:end],
+                    "type": pii_type,
+                    "start": start,
+                    "end": end,
+                    "source": "regex_static"
+                })
         
         return entities
 
     def _detect_with_bert(self, text: str) -> List[Dict]:
         """Détection avec BERT multilingue (fallback)."""
-        try:
-            results = self.models.bert_model(text)
-            entities = []
-            for res in results:
-                if 'word' in res and 'entity_group' in res and 'start' in res and 'end' in res:
-                    entity_type = res['entity_group']
-                    if entity_type in ['PER', 'LOC', 'ORG', 'MISC']:
-                        mapped_type = self._map_bert_type(entity_type)
-                        entities.append({
-                            "text": res['word'],
-                            "type": mapped_type,
-                            "start": res['start'],
-                            "end": res['end'],
-                            "source": "bert"
-                        })
-            return entities
-        except Exception as e:
-            print(f"Erreur BERT : {e}")
-            return []
+        return self._detect_with_bert_many([text])[0]
 
-    def _map_bert_type(self, entity_group: str) -> str:
-        """Mappe les types BERT."""
-        mapping = {
-            "PER": "name",     # Personne → nom
-            "PERSON": "name",  # Alternative
-            "LOC": "address",  # Lieu → adresse
-            "ORG": "company",  # Organisation → entreprise
-            "MISC": "name"     # Divers → nom (au cas où)
-        }
-        mapped = mapping.get(entity_group, "unknown")
-        print(f"🔄 Mapping BERT: '{entity_group}' → '{mapped}'")
-        return mapped
+    @_safe_detector("BERT", batched=True)
+    def _detect_with_bert_many(self, texts: List[str], batch_size: int = 32) -> List[List[Dict]]:
+        """BERT multilingue sur plusieurs textes en un seul appel batché du pipeline."""
+        if not self._bert_active:
+            return [[] for _ in texts]
+        batches = self.models.bert_model(texts, batch_size=batch_size)
+        out = []
+        for text, results in zip(texts, batches):
+            items = [
+                (res['start'], res['end'], _BERT_TYPE_MAP[res['entity_group']])
+                for res in results
+                if 'entity_group' in res and 'start' in res and 'end' in res
+                and res['entity_group'] in ('PER', 'LOC', 'ORG', 'MISC')
+            ]
+            out.append([
+                {"text": text[s:e], "type": t, "start": s, "end": e, "source": "bert"}
+                for s, e, t in items
+            ])
+        return out
 
     def _detect_with_spacy(self, text: str) -> List[Dict]:
         """Détection avec spaCy français."""
-        try:
-            doc = self.models.spacy_model(text)
+        return self._detect_with_spacy_many([text])[0]
+
+    @_safe_detector("spaCy", batched=True)
+    def _detect_with_spacy_many(self, texts: List[str], batch_size: int = 32) -> List[List[Dict]]:
+        """spaCy français sur plusieurs textes via nlp.pipe (API batchée documentée)."""
+        out = []
+        # Seul doc.ents est lu : composants inutiles sautés pour cet appel (le pipeline partagé
+        # avec Presidio reste complet, contrairement à un spacy.load(..., disable=...))
+        for doc in self.models.spacy_model.pipe(texts, batch_size=batch_size, n_process=1,
+                                                disable=_SPACY_UNUSED_FOR_NER):
             entities = []
             for ent in doc.ents:
-                entity_type = self._map_spacy_type(ent.label_)
+                entity_type = _SPACY_TYPE_MAP.get(ent.label_, "unknown")
                 if entity_type != "unknown":
                     entities.append({
                         "text": ent.text,
@@ -563,87 +1099,129 @@ class PIIDetectorFrench:
                         "end": ent.end_char,
                         "source": "spacy"
                     })
-            return entities
-        except Exception as e:
-            print(f"Erreur spaCy : {e}")
-            return []
+            out.append(entities)
+        return out
 
-    def _map_spacy_type(self, spacy_label: str) -> str:
-        """Mappe les types spaCy."""
-        mapping = {
-            "PER": "name",
-            "LOC": "address",
-            "ORG": "company"
-        }
-        return mapping.get(spacy_label, "unknown")
-
-    def _validate_entities(self, entities: List[Dict]) -> List[Dict]:
-        """Valide les entités détectées."""
-        validated = []
-        for entity in entities:
-            if 'text' in entity and 'type' in entity and entity['text'].strip():
-                validated.append(entity)
-            else:
-                print(f"Entité mal formée : {entity}")
-        return validated
-
-    def _merge_entities(self, entities: List[Dict]) -> List[Dict]:
-        """Fusionne les entités qui se chevauchent avec une logique améliorée pour les noms composés."""
+    def _merge_entities(self, entities: List[Dict], text: str) -> List[Dict]:
+        """Fusionne les entités qui se chevauchent (balayage linéaire après tri, texte relu dans l'original)."""
         if not entities:
             return []
-                
-        # Trier par position
-        entities.sort(key=lambda x: (x['start'], -x['end']))
+
+        if NUMPY_AVAILABLE and len(entities) >= MERGE_NUMPY_MIN:
+            if NUMBA_AVAILABLE:
+                merged = self._merge_numba(entities, text)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"🎯 Fusion terminée (numba) : {len(merged)} entités finales")
+                return merged
+            order, independent = self._merge_plan_numpy(entities)
+            entities = [entities[i] for i in order]
+        else:
+            # Trier par position : seule la dernière entité retenue peut chevaucher / précéder la suivante
+            entities.sort(key=lambda x: (x['start'], -x['end']))
+            independent = None
         merged = []
-        
-        for entity in entities:
-            # Vérifier les chevauchements et proximités
-            overlap = False
-            for i, merged_entity in enumerate(merged):
-                # Chevauchement classique
-                if (entity['start'] < merged_entity['end'] and 
-                    entity['end'] > merged_entity['start']):
-                    # Garder l'entité avec le meilleur score ou la plus longue
-                    if (entity.get('confidence', 0) > merged_entity.get('confidence', 0) or
-                        (entity['end'] - entity['start']) > (merged_entity['end'] - merged_entity['start'])):
-                        merged[i] = entity
-                    overlap = True
-                    break
-                    
-                # NOUVEAU: Fusion des noms adjacents (ex: "Marie-Claire" + "Dubois")
-                elif (entity['type'] in ['name', 'full_name', 'firstname'] and 
-                      merged_entity['type'] in ['name', 'full_name', 'firstname']):
-                    # Si les entités sont proches (moins de 5 caractères d'écart)
-                    gap = entity['start'] - merged_entity['end']
-                    if 0 <= gap <= 5:
-                        # Fusionner en une seule entité
-                        full_text = merged_entity['text'] + ' ' + entity['text']
-                        merged[i] = {
-                            'text': full_text,
-                            'type': 'name',  # Normaliser vers 'name'
-                            'start': merged_entity['start'],
-                            'end': entity['end'],
-                            'source': 'merged_names',
-                            'confidence': max(entity.get('confidence', 0), merged_entity.get('confidence', 0))
-                        }
-                        overlap = True
-                        print(f"🔗 Fusion de noms : '{merged_entity['text']}' + '{entity['text']}' = '{full_text}'")
-                        break
-            
-            if not overlap:
-                merged.append(entity)
-        
-        # Supprimer les doublons exacts
-        unique_entities = []
         seen = set()
-        for entity in merged:
-            key = (entity['text'].lower(), entity['type'], entity['start'], entity['end'])
-            if key not in seen:
-                unique_entities.append(entity)
+
+        for k, entity in enumerate(entities):
+            if independent is not None:
+                # Tri, dédoublonnage et entités isolées déjà résolus côté numpy
+                if independent[k] or not merged:
+                    merged.append(entity)
+                    continue
+            else:
+                key = (entity['start'], entity['end'], entity['type'])
+                if key in seen:
+                    continue
                 seen.add(key)
-        
-        print(f"🎯 Fusion terminée : {len(unique_entities)} entités finales")
-        return unique_entities
+            if merged:
+                last = merged[-1]
+                # Chevauchement classique
+                if entity['start'] < last['end'] and entity['end'] > last['start']:
+                    # Garder l'entité avec le meilleur score ou la plus longue
+                    if (entity.get('confidence', 0) > last.get('confidence', 0) or
+                        (entity['end'] - entity['start']) > (last['end'] - last['start'])):
+                        merged[-1] = entity
+                    continue
+                # Fusion des noms adjacents (ex: "Marie-Claire" + "Dubois"), moins de 5 caractères d'écart
+                if (entity['type'] in _NAME_TYPES and last['type'] in _NAME_TYPES and
+                        0 <= entity['start'] - last['end'] <= 5):
+                    merged[-1] = {
+                        'text': text[last['start']:entity['end']],
+                        'type': 'name',  # Normaliser vers 'name'
+                        'start': last['start'],
+                        'end': entity['end'],
+                        'source': 'merged_names',
+                        'confidence': max(entity.get('confidence', 0), last.get('confidence', 0))
+                    }
+                    continue
+            merged.append(entity)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"🎯 Fusion terminée : {len(merged)} entités finales")
+        return merged
+
+    @staticmethod
+    def _sort_dedup_numpy(entities: List[Dict]) -> tuple:
+        """Ordre (start, -end) des entités sans doublon (start, end, type), avec starts / ends / is_name triés."""
+        n = len(entities)
+        starts = np.fromiter((e['start'] for e in entities), dtype=np.int64, count=n)
+        ends = np.fromiter((e['end'] for e in entities), dtype=np.int64, count=n)
+        type_ids = {}
+        types = np.fromiter((type_ids.setdefault(e['type'], len(type_ids)) for e in entities), dtype=np.int64, count=n)
+        is_name = np.fromiter((e['type'] in _NAME_TYPES for e in entities), dtype=bool, count=n)
+
+        # Même ordre que sort(key=(start, -end)) : lexsort est stable, dernière clé prioritaire
+        order = np.lexsort((-ends, starts))
+        s, e, t = starts[order], ends[order], types[order]
+
+        # Doublons (start, end, type) : seule la première occurrence dans l'ordre trié est gardée
+        by_key = np.lexsort((np.arange(n), t, e, s))
+        dup = np.zeros(n, dtype=bool)
+        dup[1:] = ((s[by_key][1:] == s[by_key][:-1]) & (e[by_key][1:] == e[by_key][:-1])
+                   & (t[by_key][1:] == t[by_key][:-1]))
+        keep = np.ones(n, dtype=bool)
+        keep[by_key[dup]] = False
+        order = order[keep]
+        return order, s[keep], e[keep], is_name[order]
+
+    @classmethod
+    def _merge_plan_numpy(cls, entities: List[Dict]) -> tuple:
+        """Tri, dédoublonnage et repérage vectorisés pour _merge_entities.
+
+        Retourne l'ordre des entités conservées et, pour chacune, si elle est isolée : elle commence
+        après la fin de toutes les précédentes et ne peut être fusionnée comme nom adjacent
+        (écart > 5 ou type non-nom). Une entité isolée est ajoutée telle quelle par le balayage.
+        """
+        order, s, e, is_name = cls._sort_dedup_numpy(entities)
+        # Fin maximale des entités précédentes : la dernière entité retenue ne peut finir plus loin
+        prev_end = np.empty_like(e)
+        prev_end[0] = np.iinfo(np.int64).min
+        np.maximum.accumulate(e[:-1], out=prev_end[1:])
+        independent = (s >= prev_end) & ((s - prev_end > 5) | ~is_name)
+        return order.tolist(), independent.tolist()
+
+    @classmethod
+    def _merge_numba(cls, entities: List[Dict], text: str) -> List[Dict]:
+        """Fusion complète par le noyau compilé _merge_kernel, dicts reconstruits ensuite."""
+        order, s, e, is_name = cls._sort_dedup_numpy(entities)
+        conf = np.fromiter((entities[i].get('confidence', 0) for i in order.tolist()),
+                           dtype=np.float64, count=len(order))
+        idx, out_start, out_end, out_conf, fused = _merge_kernel(s, e, conf, is_name, 5)
+        merged = []
+        for k, start, end, c, f in zip(order[idx].tolist(), out_start.tolist(), out_end.tolist(),
+                                       out_conf.tolist(), fused.tolist()):
+            if not f:
+                merged.append(entities[k])
+                continue
+            merged.append({
+                'text': text[start:end],
+                'type': 'name',
+                'start': start,
+                'end': end,
+                'source': 'merged_names',
+                'confidence': c
+            })
+        return merged
 
     # =================== UNIFICATION TYPES ÉQUIVALENTS ===================
     def _unify_equivalent_types(self, entities: List[Dict]) -> List[Dict]:
@@ -653,30 +1231,25 @@ class PIIDetectorFrench:
         Critères d'unification:
         - Types membres présents (ex: id_card, passport)
         - Même segment texte détecté OU patterns identiques (source regex_db) sur la même plage
+
+        Les entités reçues ne sont pas modifiées (l'entité unifiée est une copie).
         """
-        GROUPS = [
-            {"canonical": "identity_document", "members": {"id_card", "passport"}},
-        ]
-        by_span = {}
+        by_span = defaultdict(list)
         for ent in entities:
-            key = (ent.get('start'), ent.get('end'))
-            by_span.setdefault(key, []).append(ent)
+            by_span[(ent.get('start'), ent.get('end'))].append(ent)
         updated = []
-        for key, ents in by_span.items():
-            replaced = False
-            for grp in GROUPS:
-                member_types = {e['type'] for e in ents}
-                intersect = member_types & grp['members']
-                if len(intersect) >= 2:  # au moins deux types concurrents détectés même span
+        for ents in by_span.values():
+            if len(ents) < 2:  # un seul type sur ce span : rien à unifier
+                updated.extend(ents)
+                continue
+            member_types = {e['type'] for e in ents}
+            for canonical, members in _UNIFY_GROUPS:
+                if len(member_types & members) >= 2:  # au moins deux types concurrents détectés même span
                     # Garder la première (priorité regex_db puis ordre) mais renommer canonical
-                    chosen = sorted(ents, key=lambda e: 0 if e.get('source') == 'regex_db' else 1)[0]
-                    chosen = dict(chosen)
-                    chosen['original_type'] = chosen['type']
-                    chosen['type'] = grp['canonical']
-                    updated.append(chosen)
-                    replaced = True
+                    chosen = min(ents, key=lambda e: e.get('source') != 'regex_db')
+                    updated.append({**chosen, 'original_type': chosen['type'], 'type': canonical})
                     break
-            if not replaced:
+            else:
                 updated.extend(ents)
         return updated
 
@@ -692,57 +1265,41 @@ class PIIDetectorFrench:
             return entities
         strict_numeric = os.getenv('PII_STRICT_NUMERIC', '1') == '1'
 
-        # Préparer index d'entités par span & type
-        cleaned = []
-        spans = []  # (start,end,type)
-        # Construire liste des emails pour exclusion
-        email_spans = [(e['start'], e['end']) for e in entities if e['type'] in ('email','EMAIL','email_address')]
+        def isolated_number(ent: Dict, t: str) -> bool:
+            """Petit nombre (3-4 chiffres) sans mot clé CVV dans les 40 caractères précédents.
+            (isdecimal : mêmes chiffres Unicode que \\d, sans passer par le moteur regex)"""
+            val, s = ent['text'], ent['start']
+            return (strict_numeric and 3 <= len(val) <= 4 and val.isdecimal() and
+                    t not in {'cvv','credit_card','iban','phone','social_security'} and
+                    not _CVV_CONTEXT_RE.search(text, max(0, s-40), s))
 
+        # Index des emails et des cartes conservées (une carte_number isolée est elle-même retirée),
+        # puis inclusion testée pour toutes les entités par bisect / searchsorted
+        emails, cards = [], []
         for ent in entities:
-            t = ent['type'].lower()
-            s, e = ent['start'], ent['end']
-            val = ent['text']
-            # 1. Supprimer noms inclus dans email
-            if t in {'name','full_name','firstname','person'}:
-                inside_email = False
-                for es, ee in email_spans:
-                    if s >= es and e <= ee:
-                        inside_email = True
-                        break
-                if inside_email:
-                    logging.info(f"🧹 SUPPR nom dans email: {val}")
-                    continue
-            # 2. Filtrage petits nombres hors contexte si strict_numeric
-            if strict_numeric and t not in {'cvv','credit_card','iban','phone','social_security'}:
-                if re.fullmatch(r'\d{3,4}', val):
-                    # Vérifier présence d'un mot clé autour sinon ignorer
-                    window_start = max(0, s-40)
-                    context = text[window_start:s].lower()
-                    if not re.search(r'(cvv|cvc|code\s+de\s+s[eé]curit[ée]|s[eé]curit[ée])', context):
-                        logging.info(f"🧹 SUPPR nombre isolé {val}")
-                        continue
-            spans.append((s,e,t))
-            cleaned.append(ent)
+            t = ent['type']
+            if t in ('email','EMAIL','email_address'):
+                emails.append(ent)
+            elif t.lower() in ('credit_card', 'card_number') and not isolated_number(ent, t.lower()):
+                cards.append(ent)
+        in_email = _spans_contained(_span_index(emails), entities)
+        in_card = _spans_contained(_span_index(cards), entities)
 
-        # 3. Supprimer fragments numériques inclus dans plus long segment du même type ou type carte/iban
         final_list = []
-        for ent in cleaned:
-            s,e = ent['start'], ent['end']
-            val = ent['text']
+        for ent, inside_email, inside_card in zip(entities, in_email, in_card):
             t = ent['type'].lower()
-            if t in {'cvv'}:
-                # si inclus dans un credit_card span plus large, ignorer
-                included = False
-                for other in cleaned:
-                    if other is ent:
-                        continue
-                    ot = other['type'].lower()
-                    if ot in {'credit_card','card_number'} and other['start'] <= s and other['end'] >= e:
-                        included = True
-                        break
-                if included:
-                    logging.info(f"🧹 SUPPR cvv fragment dans carte: {val}")
-                    continue
+            # 1. Supprimer noms inclus dans email
+            if inside_email and t in {'name','full_name','firstname','person'}:
+                logger.debug("🧹 SUPPR nom dans email: %s", ent['text'])
+                continue
+            # 2. Filtrage petits nombres hors contexte si strict_numeric
+            if isolated_number(ent, t):
+                logger.debug("🧹 SUPPR nombre isolé %s", ent['text'])
+                continue
+            # 3. Supprimer les cvv inclus dans un credit_card span plus large
+            if inside_card and t == 'cvv':
+                logger.debug("🧹 SUPPR cvv fragment dans carte: %s", ent['text'])
+                continue
             final_list.append(ent)
         return final_list
 
@@ -761,47 +1318,42 @@ class PIIDetectorFrench:
         """
         # Récupération des champs NER PERSON configurés
         try:
-            if guard_type:
-                guard_types = [{'name': guard_type}]
-            else:
-                guard_types = self.config_loader.db.get_guard_types()
+            config_fields = self._config_fields(guard_type)
         except Exception:
             return []
 
         person_fields = []
-        for gt in guard_types:
-            try:
-                for f in self.config_loader.db.get_pii_fields(gt['name']):
-                    if f['detection_type'] == 'ner' and (f.get('ner_entity_type') or '').upper() in {'PERSON','PER'}:
-                        person_fields.append({'field_name': f['field_name'], 'guard_type': gt['name']})
-            except Exception:
-                continue
+        for guard_name, pii_fields in config_fields:
+            for f in pii_fields:
+                if f['detection_type'] == 'ner' and (f.get('ner_entity_type') or '').upper() in {'PERSON','PER'}:
+                    person_fields.append({'field_name': f['field_name'], 'guard_type': guard_name})
         if not person_fields:
             return []
 
-        existing_lower_spans = {(e['text'].lower(), e['type']) for e in existing}
+        # Les deux premiers patterns exigent "app" (appelle / appele...) : sans ce mot dans le texte,
+        # seul le pattern ancré en début de texte (coût constant) est essayé
+        patterns = _NAME_PATTERNS if 'app' in text.lower() else _NAME_PATTERNS[2:]
+
+        # Premier champ person comme cible ; seules les entités déjà détectées de ce type comptent
+        # pour l'exclusion (ensemble construit au premier candidat seulement)
+        target_field = person_fields[0]
+        existing_lower = None
 
-        # Regex variantes "je m'appelle" + "mon ami(e) s'appelle" + prénom seul en tête
-        patterns = [
-            r"\bje\s+m['’ ]?app(?:e|a)l(?:e|le)\s+([a-zA-ZÀ-ÖØ-öø-ÿ'’\-]{2,40})",
-            r"\bmon\s+ami[e]?\s+s['’ ]?app(?:e|a)l(?:e|le)\s+([a-zA-ZÀ-ÖØ-öø-ÿ'’\-]{2,40})",
-            r"^\s*([a-zà-öø-ÿ]{2,30})(?=\s*[,:])"  # début de texte: josh, doua,
-        ]
         found = []
         for pat in patterns:
-            for m in re.finditer(pat, text, flags=re.IGNORECASE):
+            for m in pat.finditer(text):
                 name_raw = m.group(1).strip(" -'’")
                 if len(name_raw) < 2:
                     continue
                 # Normaliser capitalisation: Josh, Doua
                 norm = name_raw[0].upper() + name_raw[1:]
-                # Choisir premier champ person (ou celui matching guard_type)
-                target_field = person_fields[0]
-                key = (norm.lower(), target_field['field_name'])
-                if key in existing_lower_spans:
+                norm_lower = norm.lower()
+                if existing_lower is None:
+                    existing_lower = {e['text'].lower() for e in existing if e['type'] == target_field['field_name']}
+                if norm_lower in existing_lower:
                     continue
                 # Filtrer tokens bruit
-                if norm.lower() in {"mon","ami","amie","appelle","appel","je"}:
+                if norm_lower in _NAME_NOISE:
                     continue
                 found.append({
                     'text': norm,
@@ -814,3 +1366,17 @@ class PIIDetectorFrench:
                     'presidio_type': 'PERSON'
                 })
         return found
+
+
+# Instance partagée (modèles spaCy/transformers + Presidio chargés une seule fois par processus)
+_pii_detector = None
+_pii_detector_lock = threading.Lock()
+
+def get_pii_detector() -> PIIDetectorFrench:
+    """Retourne le détecteur partagé, construit au premier appel (thread-safe)."""
+    global _pii_detector
+    if _pii_detector is None:
+        with _pii_detector_lock:
+            if _pii_detector is None:
+                _pii_detector = PIIDetectorFrench()
+    return _pii_detector
@@ -1,9 +1,13 @@
 """
 Filtre pour éliminer les faux positifs des modèles NLP.
 """
+import logging
+import re
+
+logger = logging.getLogger(__name__)
 
-# Mots français communs qui ne sont jamais des entités sensibles
-COMMON_FRENCH_WORDS = {
+# Mots français communs qui ne sont jamais des entités sensibles (en minuscules)
+COMMON_FRENCH_WORDS = frozenset({
     # Salutations et expressions courantes
     "salut", "bonjour", "bonsoir", "au revoir", "à bientôt",
     
@@ -34,7 +38,7 @@ COMMON_FRENCH_WORDS = {
     
     # Nombres en lettres (petits nombres)
     "un", "deux", "trois", "quatre", "cinq", "six", "sept", "huit", "neuf", "dix"
-}
+})
 
 # Patterns suspects qui ne devraient jamais être des adresses/entreprises
 SUSPICIOUS_PATTERNS = {
@@ -54,24 +58,21 @@ SUSPICIOUS_PATTERNS = {
     ]
 }
 
-import re
+# Patterns suspects d'un même type réunis en une alternance compilée une fois
+# (appliquée à un texte déjà en minuscules) : un seul match par entité
+_SUSPICIOUS_RES = {
+    entity_type: re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+    for entity_type, patterns in SUSPICIOUS_PATTERNS.items()
+}
 
-def is_common_word(text: str) -> bool:
-    """Vérifie si le texte est un mot commun français."""
-    return text.lower().strip() in COMMON_FRENCH_WORDS
+def is_common_word(text_lower: str) -> bool:
+    """Vérifie si le texte (normalisé : sans espaces autour, en minuscules) est un mot commun français."""
+    return text_lower in COMMON_FRENCH_WORDS
 
-def is_suspicious_entity(text: str, entity_type: str) -> bool:
-    """Vérifie si l'entité détectée est suspecte selon son type."""
-    if entity_type not in SUSPICIOUS_PATTERNS:
-        return False
-    
-    text_clean = text.lower().strip()
-    
-    for pattern in SUSPICIOUS_PATTERNS[entity_type]:
-        if re.match(pattern, text_clean, re.IGNORECASE):
-            return True
-    
-    return False
+def is_suspicious_entity(text_lower: str, entity_type: str) -> bool:
+    """Vérifie si l'entité détectée (texte normalisé) est suspecte selon son type."""
+    pattern = _SUSPICIOUS_RES.get(entity_type)
+    return pattern is not None and pattern.match(text_lower) is not None
 
 def filter_false_positives(entities: list) -> list:
     """Filtre les faux positifs d'une liste d'entités."""
@@ -84,19 +85,20 @@ def filter_false_positives(entities: list) -> list:
         # Ignorer les entités vides ou trop courtes
         if len(text) < 2:
             continue
+        text_lower = text.lower()
             
         # Ignorer les mots communs (sauf si c'est un nom propre plausible)
-        if is_common_word(text):
+        if is_common_word(text_lower):
             # Autoriser prénoms très courts capitalisés (ex: "Lu")
             if entity_type in {"name", "person", "PERSON"} and text[:1].isupper() and len(text) >= 2:
                 pass
             else:
-                print(f"🚫 Filtré mot commun: '{text}' ({entity_type})")
+                logger.debug("🚫 Filtré mot commun: '%s' (%s)", text, entity_type)
                 continue
             
         # Ignorer les patterns suspects
-        if is_suspicious_entity(text, entity_type):
-            print(f"🚫 Filtré pattern suspect: '{text}' ({entity_type})")
+        if is_suspicious_entity(text_lower, entity_type):
+            logger.debug("🚫 Filtré pattern suspect: '%s' (%s)", text, entity_type)
             continue
             
         # Garder l'entité
@@ -1,8 +1,48 @@
 import json
+import logging
 import os
+import threading
+from functools import lru_cache
 from typing import Dict, List
 from pathlib import Path
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=32)
+def _read_json_cached(path: str, mtime_ns: int) -> Dict:
+    """Contenu JSON d'un fichier, relu seulement si sa date de modification change (lecture seule).
+    Octets bruts parsés par orjson si installé, sinon par json (qui accepte aussi des bytes UTF-8)."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+
+def _read_json(file_path: Path) -> Dict:
+    return _read_json_cached(str(file_path), file_path.stat().st_mtime_ns)
+
+# Phrases d'exemple : clés JSON acceptées (anglais / français) -> gabarit, dans l'ordre du texte
+_EXAMPLE_SENTENCES = (
+    (("social_security", "numero_securite_sociale"), "Mon numéro de sécurité sociale est {}"),
+    (("credit_card", "numero_carte_bancaire"), "Ma carte bancaire est {}"),
+    (("iban", "rib"), "mon IBAN est {}"),
+    (("email", "adresse_email"), "Contactez-moi à {}"),
+    (("phone", "numero_telephone"), "ou au {}"),
+    (("address", "adresse_postale_complete"), "J'habite au {}"),
+    (("company", "nom_entreprise"), "Je travaille chez {}"),
+)
+
+def _first_key(example: Dict, aliases: tuple):
+    """Première clé de `aliases` présente dans l'exemple (None sinon)."""
+    for key in aliases:
+        if key in example:
+            return key
+    return None
+
 class ConfigLoader:
     def __init__(self, data_path: str = None):
         if data_path is None:
@@ -11,57 +51,56 @@ class ConfigLoader:
             backend_dir = current_file.parent.parent.parent  # remonte à /backend/
             project_root = backend_dir.parent  # remonte à /IA_Guards/
             self.data_path = project_root / "data"
-            print(f"📁 Chemin data calculé automatiquement: {self.data_path}")
+            logger.info("📁 Chemin data calculé automatiquement: %s", self.data_path)
         else:
             self.data_path = Path(data_path)
-            print(f"📁 Chemin data personnalisé: {self.data_path}")
+            logger.info("📁 Chemin data personnalisé: %s", self.data_path)
         
         # Vérifier que le dossier data existe
         if not self.data_path.exists():
-            print(f"⚠️ Dossier data non trouvé à {self.data_path}")
-            print(f"📍 Répertoire de travail actuel: {Path.cwd()}")
+            logger.warning("⚠️ Dossier data non trouvé à %s", self.data_path)
+            logger.warning("📍 Répertoire de travail actuel: %s", Path.cwd())
             # Créer le dossier s'il n'existe pas
             self.data_path.mkdir(parents=True, exist_ok=True)
-            print(f"✅ Dossier data créé: {self.data_path}")
+            logger.info("✅ Dossier data créé: %s", self.data_path)
         
         self._guard_configs = {}
+        self._example_cache: Dict[str, tuple] = {}  # guard_type -> (mtime_ns, texte)
         self.load_all_configs()
     
     def load_all_configs(self):
         """Charge toutes les configurations JSON"""
         json_files = ["TypeA.json", "TypeB.json", "InfoPerso.json"]
         
-        print(f"🔍 Recherche des fichiers JSON dans: {self.data_path}")
-        print(f"📂 Contenu du dossier data:")
+        logger.debug("🔍 Recherche des fichiers JSON dans: %s", self.data_path)
         
-        # Lister le contenu du dossier pour debug
-        try:
-            if self.data_path.exists():
-                for item in self.data_path.iterdir():
-                    print(f"   📄 {item.name}")
-            else:
-                print(f"   ❌ Dossier {self.data_path} n'existe pas")
-        except Exception as e:
-            print(f"   ❌ Erreur lecture dossier: {e}")
+        # Lister le contenu du dossier pour debug (uniquement si LOG_LEVEL=DEBUG)
+        if logger.isEnabledFor(logging.DEBUG):
+            try:
+                if self.data_path.exists():
+                    logger.debug("📂 Contenu du dossier data: %s", [item.name for item in self.data_path.iterdir()])
+                else:
+                    logger.debug("❌ Dossier %s n'existe pas", self.data_path)
+            except Exception as e:
+                logger.debug("❌ Erreur lecture dossier: %s", e)
         
         for json_file in json_files:
             file_path = self.data_path / json_file
             guard_type = json_file.replace(".json", "")
             
-            print(f"🔎 Recherche de {json_file} à {file_path}")
+            logger.debug("🔎 Recherche de %s à %s", json_file, file_path)
             
             try:
                 if file_path.exists():
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        config = json.load(f)
-                        self._guard_configs[guard_type] = self._extract_pii_types(config)
-                        print(f"✅ Configuration {guard_type} chargée : {self._guard_configs[guard_type]}")
+                    config = _read_json(file_path)
+                    self._guard_configs[guard_type] = self._extract_pii_types(config)
+                    logger.info("✅ Configuration %s chargée : %s", guard_type, self._guard_configs[guard_type])
                 else:
-                    print(f"⚠️ Fichier {json_file} non trouvé à {file_path}")
-                    print(f"📍 Utilisation configuration par défaut pour {guard_type}")
+                    logger.warning("⚠️ Fichier %s non trouvé à %s", json_file, file_path)
+                    logger.warning("📍 Utilisation configuration par défaut pour %s", guard_type)
                     self._guard_configs[guard_type] = self._get_default_config(guard_type)
             except Exception as e:
-                print(f"❌ Erreur lors du chargement de {json_file}: {e}")
+                logger.error("❌ Erreur lors du chargement de %s: %s", json_file, e)
                 self._guard_configs[guard_type] = self._get_default_config(guard_type)
     
     def _extract_pii_types(self, config: Dict) -> List[str]:
@@ -128,9 +167,9 @@ class ConfigLoader:
         # 🆕 NOUVEAU : Permettre des types personnalisés
         mapped_type = mapping.get(json_key, json_key)
         if mapped_type != json_key:
-            print(f"🔄 Mapping: '{json_key}' → '{mapped_type}'")
+            logger.debug("🔄 Mapping: '%s' → '%s'", json_key, mapped_type)
         else:
-            print(f"🆕 Nouveau type PII détecté: '{json_key}'")
+            logger.debug("🆕 Nouveau type PII détecté: '%s'", json_key)
         
         return mapped_type
     
@@ -159,28 +198,32 @@ class ConfigLoader:
             file_path = self.data_path / json_file
             
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    self._guard_configs[guard_type] = self._extract_pii_types(config)
-                    print(f"🔄 Configuration {guard_type} rechargée")
+                config = _read_json(file_path)
+                self._guard_configs[guard_type] = self._extract_pii_types(config)
+                logger.info("🔄 Configuration %s rechargée", guard_type)
             except Exception as e:
-                print(f"❌ Erreur rechargement {guard_type}: {e}")
+                logger.error("❌ Erreur rechargement %s: %s", guard_type, e)
         else:
             self.load_all_configs()
     
     def get_example_text(self, guard_type: str) -> str:
-        """Génère un texte d'exemple basé sur la configuration JSON"""
+        """Génère un texte d'exemple basé sur la configuration JSON (mémorisé tant que le fichier ne change pas)"""
         json_file = f"{guard_type}.json"
         file_path = self.data_path / json_file
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                if "examples" in config and config["examples"]:
-                    example = config["examples"][0]
-                    return self._generate_text_from_example(example)
+            mtime_ns = file_path.stat().st_mtime_ns
+            cached = self._example_cache.get(guard_type)
+            if cached is not None and cached[0] == mtime_ns:
+                return cached[1]
+            config = _read_json_cached(str(file_path), mtime_ns)
+            if "examples" in config and config["examples"]:
+                example = config["examples"][0]
+                text = self._generate_text_from_example(example)
+                self._example_cache[guard_type] = (mtime_ns, text)
+                return text
         except Exception as e:
-            print(f"❌ Erreur génération exemple {guard_type}: {e}")
+            logger.error("❌ Erreur génération exemple %s: %s", guard_type, e)
         
         return self._get_default_example_text(guard_type)
     
@@ -192,46 +235,19 @@ class ConfigLoader:
             text_parts.append(f"Bonjour, je suis {example['name']}")
         
         # Dates et lieux de naissance
-        birth_date_key = next((k for k in ["birth_date", "date_naissance"] if k in example), None)
-        birth_place_key = next((k for k in ["birth_place", "lieu_naissance"] if k in example), None)
+        birth_date_key = _first_key(example, ("birth_date", "date_naissance"))
+        birth_place_key = _first_key(example, ("birth_place", "lieu_naissance"))
         
         if birth_date_key and birth_place_key:
             text_parts.append(f"né le {example[birth_date_key]} à {example[birth_place_key]}")
         elif birth_date_key:
             text_parts.append(f"né le {example[birth_date_key]}")
         
-        # Sécurité sociale
-        ssn_key = next((k for k in ["social_security", "numero_securite_sociale"] if k in example), None)
-        if ssn_key:
-            text_parts.append(f"Mon numéro de sécurité sociale est {example[ssn_key]}")
-        
-        # Cartes et documents
-        card_key = next((k for k in ["credit_card", "numero_carte_bancaire"] if k in example), None)
-        if card_key:
-            text_parts.append(f"Ma carte bancaire est {example[card_key]}")
-        
-        iban_key = next((k for k in ["iban", "rib"] if k in example), None)
-        if iban_key:
-            text_parts.append(f"mon IBAN est {example[iban_key]}")
-        
-        # Contact
-        email_key = next((k for k in ["email", "adresse_email"] if k in example), None)
-        if email_key:
-            text_parts.append(f"Contactez-moi à {example[email_key]}")
-        
-        phone_key = next((k for k in ["phone", "numero_telephone"] if k in example), None)
-        if phone_key:
-            text_parts.append(f"ou au {example[phone_key]}")
-        
-        # Adresse
-        address_key = next((k for k in ["address", "adresse_postale_complete"] if k in example), None)
-        if address_key:
-            text_parts.append(f"J'habite au {example[address_key]}")
-        
-        # Entreprise
-        company_key = next((k for k in ["company", "nom_entreprise"] if k in example), None)
-        if company_key:
-            text_parts.append(f"Je travaille chez {example[company_key]}")
+        # Sécurité sociale, cartes, contact, adresse, entreprise : une phrase par champ présent
+        for aliases, template in _EXAMPLE_SENTENCES:
+            key = _first_key(example, aliases)
+            if key:
+                text_parts.append(template.format(example[key]))
         
         return ". ".join(text_parts) + "."
     
@@ -244,5 +260,15 @@ class ConfigLoader:
         }
         return defaults.get(guard_type, "Exemple non disponible.")
 
-# Instance globale
-config_loader = ConfigLoader()
+# Instance partagée, construite au premier appel (pas d'E/S disque à l'import du module)
+_config_loader = None
+_config_loader_lock = threading.Lock()
+
+def get_config_loader() -> ConfigLoader:
+    """Retourne le ConfigLoader partagé, construit au premier appel (thread-safe)."""
+    global _config_loader
+    if _config_loader is None:
+        with _config_loader_lock:
+            if _config_loader is None:
+                _config_loader = ConfigLoader()
+    return _config_loader
@@ -1,5 +1,9 @@
 import re
 import json
+import os
+import time
+import functools
+import threading
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 import logging
@@ -7,6 +11,44 @@ from ..database.db_manager import db_manager
 
 logger = logging.getLogger(__name__)
 
+# Même TTL que l'instantané du détecteur : les écritures faites par un autre worker sont vues au plus tard après ce délai
+CONFIG_CACHE_TTL = float(os.getenv("PII_CONFIG_TTL", "30"))
+
+class _PatternEntry:
+    """Métadonnées d'un pattern DB compilé (chemin froid : le chemin chaud lit _patterns_by_name)."""
+    __slots__ = ('pattern', 'display_name', 'test_examples')
+
+    def __init__(self, pattern, display_name: str, test_examples: List[str]):
+        self.pattern = pattern
+        self.display_name = display_name
+        self.test_examples = test_examples
+
+class _Placeholders(dict):
+    """Valeurs pour str.format_map : un placeholder inconnu est rendu tel quel ({nom})."""
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+def _versioned_cache(maxsize: int = 64):
+    """Cache LRU d'une lecture de configuration, clé (version de config, tranche de TTL, arguments).
+
+    Toute écriture de config incrémente db.config_version : l'invalidation est O(1), les anciennes
+    entrées sortent du LRU. Les exceptions ne sont pas mises en cache. Résultats partagés : ne pas les modifier.
+    """
+    def decorator(fn):
+        cached = functools.lru_cache(maxsize=maxsize)(
+            lambda self, version, ttl_slot, *args: fn(self, *args)
+        )
+
+        @functools.wraps(fn)
+        def wrapper(self, *args):
+            if CONFIG_CACHE_TTL <= 0:
+                return fn(self, *args)
+            version = getattr(self.db, 'config_version', 0)
+            return cached(self, version, int(time.monotonic() // CONFIG_CACHE_TTL), *args)
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+    return decorator
+
 class DynamicConfigLoader:
     """
     Gestionnaire de configuration dynamique utilisant la base de données
@@ -15,41 +57,55 @@ class DynamicConfigLoader:
     
     def __init__(self):
         self.db = db_manager
-        self._compiled_patterns_cache = {}
+        self._patterns_by_name: Dict[str, re.Pattern] = {}
+        self._pattern_meta: Dict[str, _PatternEntry] = {}
+        self._patterns_version = None
         self._load_patterns_cache()
     
+    @staticmethod
+    def _compile_one(pattern: Dict[str, Any]) -> Optional[_PatternEntry]:
+        """Entrée de cache pour un pattern DB ; None si la regex est invalide"""
+        try:
+            flags = 0
+            if 'i' in pattern.get('flags', ''):
+                flags |= re.IGNORECASE
+            if 'm' in pattern.get('flags', ''):
+                flags |= re.MULTILINE
+            if 's' in pattern.get('flags', ''):
+                flags |= re.DOTALL
+            
+            compiled_pattern = re.compile(pattern['pattern'], flags)
+            return _PatternEntry(compiled_pattern, pattern['display_name'], pattern['test_examples'])
+            
+        except re.error as e:
+            logger.error(f"Pattern regex invalide '{pattern['name']}': {e}")
+            return None
+
     def _load_patterns_cache(self):
         """Charge et compile les patterns regex en cache"""
         try:
+            # Version lue avant les patterns : une écriture concurrente déclenche un nouveau chargement
+            version = self.db.config_version
             patterns = self.db.get_regex_patterns()
-            self._compiled_patterns_cache = {}
-            
+            meta = {}
             for pattern in patterns:
-                try:
-                    flags = 0
-                    if 'i' in pattern.get('flags', ''):
-                        flags |= re.IGNORECASE
-                    if 'm' in pattern.get('flags', ''):
-                        flags |= re.MULTILINE
-                    if 's' in pattern.get('flags', ''):
-                        flags |= re.DOTALL
-                    
-                    compiled_pattern = re.compile(pattern['pattern'], flags)
-                    self._compiled_patterns_cache[pattern['name']] = {
-                        'pattern': compiled_pattern,
-                        'display_name': pattern['display_name'],
-                        'test_examples': pattern['test_examples']
-                    }
-                    
-                except re.error as e:
-                    logger.error(f"Pattern regex invalide '{pattern['name']}': {e}")
-                    
+                entry = self._compile_one(pattern)
+                if entry is not None:
+                    meta[pattern['name']] = entry
+            # Nouveaux dicts remplis à part puis publiés d'un coup : un lecteur concurrent ne voit
+            # jamais un cache vide ou partiel pendant un rechargement
+            self._pattern_meta = meta
+            self._patterns_by_name = {name: entry.pattern for name, entry in meta.items()}
+            self._patterns_version = version
         except Exception as e:
             logger.error(f"Erreur chargement patterns: {e}")
     
     def reload_patterns_cache(self):
         """Recharge le cache des patterns"""
         self._load_patterns_cache()
+        # Invalide aussi les caches dérivés de la config (regex compilées, résultats de détection),
+        # sur tous les workers : /config/reload sert aux modifications faites directement en base
+        self.db.invalidate_config_caches()
         logger.info("Cache des patterns rechargé")
     
     # =================== MÉTHODES COMPATIBLES ANCIEN SYSTÈME ===================
@@ -60,84 +116,92 @@ class DynamicConfigLoader:
         (Compatible avec l'ancien système)
         """
         try:
-            pii_fields = self.db.get_pii_fields(guard_type)
-            return [field['field_name'] for field in pii_fields if field['is_active']]
+            return self._guard_types(guard_type)
         except Exception as e:
             logger.error(f"Erreur récupération types pour {guard_type}: {e}")
             return []
+
+    @_versioned_cache()
+    def _guard_types(self, guard_type: str) -> List[str]:
+        pii_fields = self.db.get_pii_fields(guard_type)
+        return [field['field_name'] for field in pii_fields if field['is_active']]
     
     def get_all_configs(self) -> Dict[str, Any]:
         """
         Retourne toutes les configurations (compatible ancien système)
         """
         try:
-            guard_types = self.db.get_guard_types()
-            configs = {}
-            
-            for guard_type in guard_types:
-                guard_name = guard_type['name']
-                pii_fields = self.db.get_pii_fields(guard_name)
-                
-                configs[guard_name] = {
-                    'info': {
-                        'display_name': guard_type['display_name'],
-                        'description': guard_type['description'],
-                        'icon': guard_type['icon'],
-                        'color': guard_type['color']
-                    },
-                    'fields': {}
-                }
-                
-                for field in pii_fields:
-                    field_config = {
-                        'type': field['detection_type'],
-                        'example': field['example_value']
-                    }
-                    
-                    # Ajouter pattern si c'est du regex
-                    if field['detection_type'] in ['regex', 'hybrid'] and field['pattern']:
-                        field_config['pattern'] = field['pattern']
-                    
-                    # Ajouter type NER si applicable
-                    if field['detection_type'] in ['ner', 'hybrid'] and field['ner_entity_type']:
-                        field_config['ner_entity_type'] = field['ner_entity_type']
-                    
-                    configs[guard_name]['fields'][field['field_name']] = field_config
-            
-            return configs
-            
+            return self._all_configs()
         except Exception as e:
             logger.error(f"Erreur récupération configurations: {e}")
             return {}
+
+    @_versioned_cache()
+    def _all_configs(self) -> Dict[str, Any]:
+        # Une seule requête pour tous les types et leurs champs (pas de N+1)
+        guard_types = self.db.get_all_guard_types_with_fields()
+        configs = {}
+        
+        for guard_type in guard_types:
+            guard_name = guard_type['name']
+            pii_fields = guard_type['fields']
+            
+            configs[guard_name] = {
+                'info': {
+                    'display_name': guard_type['display_name'],
+                    'description': guard_type['description'],
+                    'icon': guard_type['icon'],
+                    'color': guard_type['color']
+                },
+                'fields': {}
+            }
+            
+            for field in pii_fields:
+                field_config = {
+                    'type': field['detection_type'],
+                    'example': field['example_value']
+                }
+                
+                # Ajouter pattern si c'est du regex
+                if field['detection_type'] in ['regex', 'hybrid'] and field['pattern']:
+                    field_config['pattern'] = field['pattern']
+                
+                # Ajouter type NER si applicable
+                if field['detection_type'] in ['ner', 'hybrid'] and field['ner_entity_type']:
+                    field_config['ner_entity_type'] = field['ner_entity_type']
+                
+                configs[guard_name]['fields'][field['field_name']] = field_config
+        
+        return configs
     
     def get_example_text(self, guard_type: str) -> str:
         """
         Génère un texte d'exemple basé sur les champs configurés
         """
         try:
-            pii_fields = self.db.get_pii_fields(guard_type)
-            
-            # Templates de phrases par type de guard
-            templates = {
-                'TypeA': "Bonjour, je suis {name}, né le {birth_date}. Mon numéro de sécurité sociale est {social_security}.",
-                'TypeB': "Ma carte bancaire {credit_card} avec le code {cvv} et mon IBAN {iban}.",
-                'InfoPerso': "Contactez-moi à {email} ou au {phone}. J'habite à {address}."
-            }
-            
-            template = templates.get(guard_type, "Exemple avec {field_name}")
-            
-            # Remplacer les champs par leurs exemples
-            example_text = template
-            for field in pii_fields:
-                placeholder = "{" + field['field_name'] + "}"
-                if placeholder in example_text and field['example_value']:
-                    example_text = example_text.replace(placeholder, field['example_value'])
-            
-            return example_text
-            
+            return self._example_text(guard_type)
         except Exception as e:
             logger.error(f"Erreur génération exemple pour {guard_type}: {e}")
             return f"Exemple pour {guard_type} non disponible"
+
+    @_versioned_cache()
+    def _example_text(self, guard_type: str) -> str:
+        pii_fields = self.db.get_pii_fields(guard_type)
+        
+        # Templates de phrases par type de guard
+        templates = {
+            'TypeA': "Bonjour, je suis {name}, né le {birth_date}. Mon numéro de sécurité sociale est {social_security}.",
+            'TypeB': "Ma carte bancaire {credit_card} avec le code {cvv} et mon IBAN {iban}.",
+            'InfoPerso': "Contactez-moi à {email} ou au {phone}. J'habite à {address}."
+        }
+        
+        template = templates.get(guard_type, "Exemple avec {field_name}")
+        
+        # Remplacer les champs par leurs exemples en un seul passage sur le template
+        # (placeholders sans exemple laissés tels quels)
+        return template.format_map(_Placeholders(
+            (field['field_name'], field['example_value']) for field in pii_fields if field['example_value']
+        ))
     
     def reload_config(self, guard_type: str = None):
         """
@@ -297,8 +361,10 @@ class DynamicConfigLoader:
             return {'success': False, 'error': str(e)}
     
     def get_compiled_pattern(self, pattern_name: str):
-        """Retourne un pattern compilé depuis le cache"""
-        return self._compiled_patterns_cache.get(pattern_name, {}).get('pattern')
+        """Retourne un pattern compilé depuis le cache (rechargé si la config a changé, sur n'importe quel worker)"""
+        if self._patterns_version != self.db.config_version:
+            self._load_patterns_cache()
+        return self._patterns_by_name.get(pattern_name)
     
     def get_detection_config(self, guard_type: str) -> Dict[str, Any]:
         """
@@ -306,48 +372,69 @@ class DynamicConfigLoader:
         Format optimisé pour le détecteur PII
         """
         try:
-            pii_fields = self.db.get_pii_fields(guard_type)
+            return self._detection_config(guard_type)
+        except Exception as e:
+            logger.error(f"Erreur récupération config détection: {e}")
+            return {'regex_fields': {}, 'ner_fields': {}, 'hybrid_fields': {}}
+
+    @_versioned_cache()
+    def _detection_config(self, guard_type: str) -> Dict[str, Any]:
+        pii_fields = self.db.get_pii_fields(guard_type)
+        
+        config = {
+            'regex_fields': {},
+            'ner_fields': {},
+            'hybrid_fields': {}
+        }
+        
+        for field in pii_fields:
+            field_name = field['field_name']
+            detection_type = field['detection_type']
             
-            config = {
-                'regex_fields': {},
-                'ner_fields': {},
-                'hybrid_fields': {}
+            field_config = {
+                'display_name': field['display_name'],
+                'example': field['example_value']
             }
             
-            for field in pii_fields:
-                field_name = field['field_name']
-                detection_type = field['detection_type']
-                
-                field_config = {
-                    'display_name': field['display_name'],
-                    'example': field['example_value']
-                }
-                
-                if detection_type == 'regex':
-                    if field['pattern']:
-                        compiled_pattern = self.get_compiled_pattern(field['regex_pattern'])
-                        if compiled_pattern:
-                            field_config['compiled_pattern'] = compiled_pattern
-                    config['regex_fields'][field_name] = field_config
-                
-                elif detection_type == 'ner':
-                    field_config['entity_type'] = field['ner_entity_type']
-                    config['ner_fields'][field_name] = field_config
-                
-                elif detection_type == 'hybrid':
-                    if field['pattern']:
-                        compiled_pattern = self.get_compiled_pattern(field['regex_pattern'])
-                        if compiled_pattern:
-                            field_config['compiled_pattern'] = compiled_pattern
-                    
-                    field_config['entity_type'] = field['ner_entity_type']
-                    config['hybrid_fields'][field_name] = field_config
+            if detection_type == 'regex':
+                if field['pattern']:
+                    compiled_pattern = self.get_compiled_pattern(field['regex_pattern'])
+                    if compiled_pattern:
+                        field_config['compiled_pattern'] = compiled_pattern
+                config['regex_fields'][field_name] = field_config
             
-            return config
+            elif detection_type == 'ner':
+                field_config['entity_type'] = field['ner_entity_type']
+                config['ner_fields'][field_name] = field_config
             
-        except Exception as e:
-            logger.error(f"Erreur récupération config détection: {e}")
-            return {'regex_fields': {}, 'ner_fields': {}, 'hybrid_fields': {}}
+            elif detection_type == 'hybrid':
+                if field['pattern']:
+                    compiled_pattern = self.get_compiled_pattern(field['regex_pattern'])
+                    if compiled_pattern:
+                        field_config['compiled_pattern'] = compiled_pattern
+                
+                field_config['entity_type'] = field['ner_entity_type']
+                config['hybrid_fields'][field_name] = field_config
+        
+        return config
+
+# Instance partagée, construite au premier usage (pas de requête DB à l'import du module)
+_dynamic_config_loader = None
+_dynamic_config_loader_lock = threading.Lock()
+
+def get_dynamic_config_loader() -> DynamicConfigLoader:
+    """Retourne le DynamicConfigLoader partagé, construit au premier appel (thread-safe)."""
+    global _dynamic_config_loader
+    if _dynamic_config_loader is None:
+        with _dynamic_config_loader_lock:
+            if _dynamic_config_loader is None:
+                _dynamic_config_loader = DynamicConfigLoader()
+    return _dynamic_config_loader
+
+class _LazyDynamicConfigLoader:
+    """Relais vers get_dynamic_config_loader() : l'instance n'est créée qu'au premier attribut lu."""
+    def __getattr__(self, name):
+        return getattr(get_dynamic_config_loader(), name)
 
 # Instance globale (compatible avec l'ancien système)
-dynamic_config_loader = DynamicConfigLoader()
+dynamic_config_loader = _LazyDynamicConfigLoader()
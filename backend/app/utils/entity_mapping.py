@@ -11,7 +11,8 @@ Rationale:
   scripts can send flexible synonyms (EMAIL, mail, Email_Address, ...)
   while we store & operate only on canonical Presidio-aligned labels.
 """
-from typing import Dict, Set, Tuple
+from types import MappingProxyType
+from typing import Dict, Mapping, Set, Tuple
 
 # Canonical labels (aligned with Presidio where applicable) – keep UPPERCASE.
 CANONICAL_ENTITIES: Set[str] = {
@@ -103,10 +104,13 @@ _SYNONYM_MAPPING: Dict[str, str] = {
 }
 
 # Combine canonical self-maps so lookups are always possible.
-ENTITY_MAPPING: Dict[str, str] = {
+# Read-only view: built once at import, shared by the API and the detector.
+ENTITY_MAPPING: Mapping[str, str] = MappingProxyType({
     **{c: c for c in CANONICAL_ENTITIES},
     **_SYNONYM_MAPPING,
-}
+})
+
+_HYPHEN_TO_UNDERSCORE = str.maketrans("-", "_")
 
 def canonicalize_entity(label: str) -> Tuple[str, bool]:
     """Return (canonical_label, is_valid).
@@ -116,10 +120,14 @@ def canonicalize_entity(label: str) -> Tuple[str, bool]:
     """
     if not label:
         return "", False
-    key = label.strip().upper()
+    # Fast path: label already a canonical or synonym key (no normalisation needed)
+    mapped = ENTITY_MAPPING.get(label)
+    if mapped is not None:
+        return mapped, True
     # Normalise some accidental variants like EMAIL-ADDRESS, emailAddress
-    key = key.replace("-", "_")
-    return ENTITY_MAPPING.get(key, key), (key in ENTITY_MAPPING)
+    key = label.strip().upper().translate(_HYPHEN_TO_UNDERSCORE)
+    mapped = ENTITY_MAPPING.get(key)
+    return (key, False) if mapped is None else (mapped, True)
 
 def list_supported_entities(include_synonyms: bool = False):
     """List supported canonical entities; optionally include synonyms."""
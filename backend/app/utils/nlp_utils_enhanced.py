@@ -1,3 +1,14 @@
+import os
+import threading
+
+# Threads intra-op torch / OpenMP / MKL par processus (1 par défaut : le parallélisme vient des
+# workers ASGI, un par cœur). Fixé avant l'import de torch (via transformers) pour OpenMP.
+NER_THREADS = max(1, int(os.getenv("PII_NER_THREADS", "1")))
+for _var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_var, str(NER_THREADS))
+# Pas de threads Rust du tokenizer rapide : même raison, et évite l'avertissement / blocage après fork des workers
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
 try:
     from transformers import pipeline
     TRANSFORMERS_AVAILABLE = True
@@ -9,90 +20,346 @@ try:
     SPACY_AVAILABLE = True
 except ImportError:
     SPACY_AVAILABLE = False
-    
-import os
+
+# NER français : DistilCamemBERT (moitié moins de couches que CamemBERT, F1 quasi identique).
+# PII_CAMEMBERT_MODEL=Jean-Baptiste/camembert-ner pour revenir au modèle complet.
+CAMEMBERT_MODEL = os.getenv("PII_CAMEMBERT_MODEL", "cmarkea/distilcamembert-base-ner")
+
+# Textes plus longs que le modèle (512 tokens) découpés en fenêtres qui se chevauchent de
+# NER_STRIDE tokens, entités fusionnées par le pipeline (0 : pas de découpage).
+NER_STRIDE = max(0, int(os.getenv("PII_NER_STRIDE", "128")))
+
+def _window_kwargs() -> dict:
+    """Paramètres de fenêtrage fixés une fois sur le pipeline (tokenizer rapide requis)."""
+    return {"stride": NER_STRIDE} if NER_STRIDE else {}
+
+def _pin_torch_threads():
+    """Limite torch à NER_THREADS threads intra-op et 1 inter-op (évite la contention entre requêtes)."""
+    try:
+        import torch
+        torch.set_num_threads(NER_THREADS)
+        torch.set_num_interop_threads(1)
+    except Exception as e:  # RuntimeError si le pool inter-op a déjà servi
+        print(f"⚠️ Réglage des threads torch incomplet : {e}")
+
+def _quantize_int8(ner_pipeline):
+    """Quantification dynamique int8 des couches Linear (inférence CPU ~2x plus rapide, poids ~4x plus légers).
+
+    Désactivable via PII_NER_INT8=0 ; en cas d'échec le modèle FP32 est conservé.
+    """
+    if os.getenv("PII_NER_INT8", "1").lower() not in ("1", "true", "yes"):
+        return ner_pipeline
+    try:
+        import torch
+        ner_pipeline.model = torch.quantization.quantize_dynamic(
+            ner_pipeline.model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        print("⚡ Modèle quantifié en int8 (CPU)")
+    except Exception as e:
+        print(f"⚠️ Quantification int8 impossible, FP32 conservé : {e}")
+    return ner_pipeline
+
+def _inference_mode(ner_pipeline):
+    """Passe avant du pipeline sous torch.inference_mode au lieu de torch.no_grad
+    (ni suivi autograd ni compteurs de version sur les tenseurs)."""
+    try:
+        import torch
+        ner_pipeline.get_inference_context = lambda: torch.inference_mode
+    except Exception as e:
+        print(f"⚠️ inference_mode indisponible, no_grad conservé : {e}")
+    return ner_pipeline
+
+def _compile_model(ner_pipeline):
+    """torch.compile du modèle du pipeline (opt-in via PII_TORCH_COMPILE=1).
+
+    dynamic=True : un seul graphe réutilisé quelle que soit la longueur de séquence.
+    En cas d'échec (torch < 2.0, backend indisponible) le modèle eager est conservé.
+    """
+    if os.getenv("PII_TORCH_COMPILE", "0").lower() not in ("1", "true", "yes"):
+        return ner_pipeline
+    try:
+        import torch
+        ner_pipeline.model = torch.compile(ner_pipeline.model, mode="reduce-overhead", dynamic=True)
+        print("⚡ Modèle compilé (torch.compile)")
+    except Exception as e:
+        print(f"⚠️ torch.compile impossible, mode eager conservé : {e}")
+    return ner_pipeline
+
+class _TracedTokenClassifier:
+    """Module TorchScript (tracé + optimisé pour l'inférence) exposé avec l'interface appelée par le
+    pipeline token-classification : model(**inputs) -> sortie avec .logits."""
+    def __init__(self, model, traced, input_names):
+        self.config = model.config
+        self.device = model.device
+        self.dtype = getattr(model, "dtype", None)
+        self.traced = traced
+        self.input_names = input_names
+
+    def __call__(self, **inputs):
+        from transformers.modeling_outputs import TokenClassifierOutput
+        return TokenClassifierOutput(logits=self.traced(*(inputs[n] for n in self.input_names))[0])
+
+    def eval(self):
+        return self
+
+def _trace_model(ner_pipeline):
+    """torch.jit.trace + optimize_for_inference du modèle (opt-in via PII_TORCH_JIT=1, exclusif de torch.compile).
+
+    Tracé sur une entrée factice (1, 16) puis comparé au modèle eager sur une autre longueur :
+    en cas d'écart ou d'échec, le modèle eager est conservé.
+    """
+    if os.getenv("PII_TORCH_JIT", "0").lower() not in ("1", "true", "yes"):
+        return ner_pipeline
+    if os.getenv("PII_TORCH_COMPILE", "0").lower() in ("1", "true", "yes"):
+        return ner_pipeline
+    try:
+        import torch
+        model = ner_pipeline.model.eval()
+        tokenizer = ner_pipeline.tokenizer
+        input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in tokenizer.model_input_names]
+        dummy = tokenizer("warmup " * 16, return_tensors="pt", truncation=True, max_length=16, padding="max_length")
+        with torch.inference_mode():
+            traced = torch.jit.trace(model, tuple(dummy[n] for n in input_names), strict=False)
+            traced = torch.jit.optimize_for_inference(torch.jit.freeze(traced.eval()))
+            check = tokenizer("Jean Dupont habite au 12 rue de la Paix à Paris.", return_tensors="pt")
+            expected = model(**{n: check[n] for n in input_names}).logits
+            got = traced(*(check[n] for n in input_names))[0]
+        if not torch.allclose(expected, got, atol=1e-3):
+            raise ValueError("sorties tracées différentes du modèle eager")
+        ner_pipeline.model = _TracedTokenClassifier(model, traced, input_names)
+        print("⚡ Modèle tracé (TorchScript)")
+    except Exception as e:
+        print(f"⚠️ Tracé TorchScript impossible, mode eager conservé : {str(e)[:100]}")
+    return ner_pipeline
+
+def _warmup(name: str, model):
+    """Premier appel à vide (allocations, caches de noyaux, vocabulaire) pour ne pas le payer à la première requête."""
+    if model is None or os.getenv("PII_WARMUP", "1").lower() not in ("1", "true", "yes"):
+        return
+    try:
+        model("Jean Dupont habite à Paris.")
+    except Exception as e:
+        print(f"⚠️ Préchauffage {name} échoué : {str(e)[:100]}")
+
+def _onnx_int8_pipeline(model_id: str):
+    """Pipeline NER sur ONNX Runtime, modèle exporté puis quantifié int8 (dynamique, VNNI).
+
+    L'export et la quantification sont faits une seule fois puis relus depuis PII_ONNX_CACHE_DIR.
+    """
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForTokenClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from optimum.pipelines import pipeline as ort_pipeline
+    from transformers import AutoTokenizer
+
+    cache_root = os.getenv("PII_ONNX_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ai-guards-onnx"))
+    export_dir = os.path.join(cache_root, model_id.replace("/", "__"))
+    quant_dir = os.path.join(export_dir, "int8")
+    if not os.path.isfile(os.path.join(quant_dir, "model_quantized.onnx")):
+        print(f"📦 Export ONNX + quantification int8 de {model_id}...")
+        ORTModelForTokenClassification.from_pretrained(model_id, export=True).save_pretrained(export_dir)
+        ORTQuantizer.from_pretrained(export_dir).quantize(
+            save_dir=quant_dir,
+            quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        )
+        AutoTokenizer.from_pretrained(model_id).save_pretrained(quant_dir)
+
+    sess_options = ort.SessionOptions()
+    sess_options.intra_op_num_threads = NER_THREADS
+    sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    model = ORTModelForTokenClassification.from_pretrained(
+        quant_dir, file_name="model_quantized.onnx", session_options=sess_options
+    )
+    return ort_pipeline(
+        "token-classification", model=model, tokenizer=AutoTokenizer.from_pretrained(quant_dir),
+        accelerator="ort", aggregation_strategy="simple", **_window_kwargs()
+    )
+
+class TritonNerPipeline:
+    """Pipeline NER dont le forward est servi par Triton Inference Server (moteur TensorRT / ONNX).
+
+    Même interface que le pipeline HF avec aggregation_strategy="simple" : tokenisation et
+    regroupement des entités restent locaux, le batching dynamique est fait côté serveur.
+    Le modèle Triton doit exposer les entrées input_ids / attention_mask (INT64) et la sortie logits.
+    """
+    def __init__(self, model_id: str, triton_model: str, url: str):
+        import tritonclient.http as triton_http
+        from transformers import AutoConfig, AutoTokenizer
+        self._triton_http = triton_http
+        self.client = triton_http.InferenceServerClient(url=url)
+        self.triton_model = triton_model
+        self.tokenizer = AutoTokenizer.from_pretrained(model_id)
+        self.id2label = {int(k): v for k, v in AutoConfig.from_pretrained(model_id).id2label.items()}
+
+    def __call__(self, texts, batch_size: int = 32):
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+        results = []
+        for i in range(0, len(texts), batch_size):
+            results.extend(self._infer(texts[i:i + batch_size]))
+        return results[0] if single else results
+
+    def _infer(self, texts):
+        import numpy as np
+        enc = self.tokenizer(texts, padding=True, truncation=True, return_offsets_mapping=True, return_tensors="np")
+        inputs = []
+        for name in ("input_ids", "attention_mask"):
+            arr = enc[name].astype(np.int64)
+            inp = self._triton_http.InferInput(name, list(arr.shape), "INT64")
+            inp.set_data_from_numpy(arr)
+            inputs.append(inp)
+        response = self.client.infer(self.triton_model, inputs,
+                                     outputs=[self._triton_http.InferRequestedOutput("logits")])
+        logits = response.as_numpy("logits")
+        probs = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        probs /= probs.sum(axis=-1, keepdims=True)
+        labels, scores = probs.argmax(axis=-1), probs.max(axis=-1)
+        return [
+            self._aggregate(text, enc["offset_mapping"][b], enc["attention_mask"][b], labels[b], scores[b])
+            for b, text in enumerate(texts)
+        ]
+
+    def _aggregate(self, text, offsets, mask, labels, scores):
+        """Regroupe les tokens consécutifs de même type (B-/I-) en entités, comme la stratégie "simple"."""
+        entities, current = [], None
+        for (start, end), m, label_id, score in zip(offsets, mask, labels, scores):
+            if not m or start == end:  # padding / tokens spéciaux
+                continue
+            label = self.id2label.get(int(label_id), "O")
+            if label == "O":
+                current = None
+                continue
+            prefix, _, group = label.rpartition("-")
+            if current is not None and group == current["entity_group"] and prefix != "B":
+                current["end"] = int(end)
+                current["_scores"].append(float(score))
+            else:
+                current = {"entity_group": group, "start": int(start), "end": int(end), "_scores": [float(score)]}
+                entities.append(current)
+        for e in entities:
+            token_scores = e.pop("_scores")
+            e["score"] = sum(token_scores) / len(token_scores)
+            e["word"] = text[e["start"]:e["end"]]
+        return entities
+
+def _load_ner_pipeline(model_id: str, **kwargs):
+    """Pipeline NER selon PII_NER_BACKEND : triton (serveur d'inférence distant), onnx (ONNX Runtime
+    int8, optimum installé) ou torch par défaut (quantification dynamique int8 + torch.compile optionnel)."""
+    backend = os.getenv("PII_NER_BACKEND", "torch").lower()
+    if backend == "triton":
+        try:
+            ner = TritonNerPipeline(
+                model_id,
+                triton_model=model_id.split("/")[-1],
+                url=os.getenv("PII_TRITON_URL", "localhost:8000")
+            )
+            print(f"⚡ {model_id} servi par Triton ({ner.triton_model})")
+            return ner
+        except Exception as e:
+            print(f"⚠️ Backend Triton indisponible pour {model_id}, repli PyTorch : {str(e)[:100]}")
+    if backend == "onnx":
+        try:
+            ner = _onnx_int8_pipeline(model_id)
+            print(f"⚡ {model_id} chargé sur ONNX Runtime (int8)")
+            return ner
+        except Exception as e:
+            print(f"⚠️ Backend ONNX indisponible pour {model_id}, repli PyTorch : {str(e)[:100]}")
+    return _inference_mode(_compile_model(_trace_model(_quantize_int8(pipeline("ner", model=model_id, **_window_kwargs(), **kwargs)))))
+
+def _lazy_model(loader):
+    """Attribut de modèle chargé (puis préchauffé) au premier accès, verrou + double vérification.
+
+    Le résultat est rangé dans le __dict__ de l'instance, qui masque ensuite le descripteur : les
+    accès suivants sont de simples lectures d'attribut (et l'attribut reste assignable).
+    """
+    name = loader.__name__
+
+    class _Descriptor:
+        def __get__(self, obj, owner=None):
+            if obj is None:
+                return self
+            with obj._load_lock:
+                if name not in obj.__dict__:
+                    obj.__dict__[name] = loader(obj)
+            return obj.__dict__[name]
+    return _Descriptor()
 
 class NLPModels:
+    """Modèles NLP internes, chacun chargé à son premier usage (un modèle jamais utilisé n'est jamais chargé)."""
+
     def __init__(self):
-        print("🔄 Initialisation des modèles NLP...")
-        
-        # 1. Modèle spaCy français
-        if SPACY_AVAILABLE:
-            try:
-                self.spacy_model = spacy.load("fr_core_news_sm")
-                print("✅ Modèle spaCy français chargé")
-            except OSError:
-                print("⚠️ Modèle spaCy français non trouvé. Installation requise : python -m spacy download fr_core_news_sm")
-                self.spacy_model = None
-        else:
+        self._load_lock = threading.RLock()
+        self._torch_pinned = False
+
+    def _pin_torch_once(self):
+        if not self._torch_pinned:
+            _pin_torch_threads()
+            self._torch_pinned = True
+
+    # 1. Modèle spaCy français
+    @_lazy_model
+    def spacy_model(self):
+        if not SPACY_AVAILABLE:
             print("⚠️ spaCy non disponible")
-            self.spacy_model = None
-        
-        # 2. Modèle BERT original (multilingue)
-        if TRANSFORMERS_AVAILABLE:
-            try:
-                self.bert_model = pipeline(
-                    "ner",
-                    model="dslim/bert-base-NER",
-                    aggregation_strategy="simple",
-                    device=-1  # CPU
-                )
-                print("✅ Modèle BERT multilingue chargé")
-            except Exception as e:
-                print(f"⚠️ Erreur chargement BERT : {e}")
-                self.bert_model = None
-        else:
+            return None
+        try:
+            model = spacy.load("fr_core_news_sm")
+            print("✅ Modèle spaCy français chargé")
+        except OSError:
+            print("⚠️ Modèle spaCy français non trouvé. Installation requise : python -m spacy download fr_core_news_sm")
+            return None
+        _warmup("spaCy", model)
+        return model
+
+    # 2. Modèle BERT original (multilingue)
+    @_lazy_model
+    def bert_model(self):
+        if not TRANSFORMERS_AVAILABLE:
             print("⚠️ transformers non disponible")
-            self.bert_model = None
-        
-        # 3. NOUVEAU : Modèle CamemBERT français spécialisé
-        if TRANSFORMERS_AVAILABLE:
-            try:
-                print("📦 Tentative de chargement de CamemBERT...")
-                self.camembert_model = pipeline(
-                    "ner",
-                    model="Jean-Baptiste/camembert-ner",
-                    aggregation_strategy="simple",
-                    device=-1,  # CPU
-                    return_all_scores=False,
-                    trust_remote_code=True
-                )
-                print("✅ Modèle CamemBERT français chargé")
-            except Exception as e:
-                print(f"⚠️ CamemBERT non disponible : {str(e)[:100]}...")
-                self.camembert_model = None
-        else:
-            self.camembert_model = None
-        
-        # 4. NOUVEAU : Modèle français alternatif (plus léger)
-        if TRANSFORMERS_AVAILABLE:
-            try:
-                print("📦 Tentative de chargement du modèle français alternatif...")
-                # Utilisons un modèle plus simple et fiable
-                self.french_model = pipeline(
-                    "ner",
-                    model="dbmdz/bert-large-cased-finetuned-conll03-english",  # Modèle plus stable
-                    aggregation_strategy="simple",
-                    device=-1
-                )
-                print("✅ Modèle français alternatif chargé")
-            except Exception as e:
-                print(f"⚠️ Modèle alternatif non disponible : {str(e)[:100]}...")
-                self.french_model = None
-        else:
-            self.french_model = None
-            
-        print("🎯 Initialisation des modèles terminée")
-        
+            return None
+        self._pin_torch_once()
+        try:
+            model = _load_ner_pipeline(
+                "dslim/bert-base-NER",
+                aggregation_strategy="simple",
+                device=-1  # CPU
+            )
+            print("✅ Modèle BERT multilingue chargé")
+        except Exception as e:
+            print(f"⚠️ Erreur chargement BERT : {e}")
+            return None
+        _warmup("BERT", model)
+        return model
+
+    # 3. Modèle CamemBERT français spécialisé
+    @_lazy_model
+    def camembert_model(self):
+        if not TRANSFORMERS_AVAILABLE:
+            return None
+        self._pin_torch_once()
+        try:
+            print(f"📦 Tentative de chargement de CamemBERT ({CAMEMBERT_MODEL})...")
+            model = _load_ner_pipeline(
+                CAMEMBERT_MODEL,
+                aggregation_strategy="simple",
+                device=-1  # CPU
+            )
+            print("✅ Modèle CamemBERT français chargé")
+        except Exception as e:
+            print(f"⚠️ CamemBERT non disponible : {str(e)[:100]}...")
+            return None
+        _warmup("CamemBERT", model)
+        return model
+
     def get_available_models(self):
-        """Retourne la liste des modèles disponibles"""
+        """Retourne la liste des modèles chargés (sans déclencher de chargement)"""
+        loaded = self.__dict__
         models = []
-        if self.bert_model:
+        if loaded.get('bert_model'):
             models.append("BERT (multilingue)")
-        if self.camembert_model:
+        if loaded.get('camembert_model'):
             models.append("CamemBERT (français)")
-        if hasattr(self, 'french_model') and self.french_model:
-            models.append("Modèle français alternatif")
-        if self.spacy_model:
+        if loaded.get('spacy_model'):
             models.append("spaCy (français)")
         return models
@@ -1,4 +1,17 @@
 import re
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+
+try:
+    import hyperscan  # type: ignore  # optionnel (requirements-ml.txt), x86 uniquement
+except ImportError:
+    hyperscan = None
+
+try:
+    import re2  # type: ignore  # optionnel (requirements-ml.txt), repli quand Hyperscan est absent
+except ImportError:
+    re2 = None
 
 class NamedPattern:
     def __init__(self, name: str, pattern: str):
@@ -13,7 +26,8 @@ class RegexPatterns:
     SOCIAL_SECURITY = NamedPattern("SSN", r'\b\d{1}\s?\d{2}\s?\d{2}\s?\d{2}\s?\d{3}\s?\d{3}\s?\d{2}\b')
     ID_CARD = NamedPattern("ID", r'\b[A-Z]{2}\d{6,8}\b')
     PASSPORT = NamedPattern("PASSPORT", r'\b\d{2}[A-Z]{2}\d{5}\b')
-    DRIVING_LICENSE = NamedPattern("LICENSE", r'\b\d{9,12}\b')
+    # Patterns numériques trop génériques seuls : ancrés sur un mot-clé, la valeur est le groupe <type>_value
+    DRIVING_LICENSE = NamedPattern("LICENSE", r'\b(?i:permis(?:\s+de\s+conduire)?)(?:\s*(?i:n[°o]|num[ée]ro))?[\s:]*(?P<driving_license_value>\d{9,12})\b')
     BIRTH_DATE = NamedPattern("BIRTH", r'\b\d{1,2}[\/\-\.]\d{1,2}[\/\-\.]\d{4}\b')
     BIRTH_PLACE = NamedPattern("BIRTH_PLACE", r'\bà\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\b')
     
@@ -21,18 +35,19 @@ class RegexPatterns:
     CREDIT_CARD = NamedPattern("CC", r'\b\d{4}[\s\-]?\d{4}[\s\-]?\d{4}[\s\-]?\d{4}\b')
     IBAN = NamedPattern("IBAN", r'\b[A-Z]{2}\d{2}[\s]?\d{4}[\s]?\d{4}[\s]?\d{4}[\s]?\d{4}[\s]?\d{4}[\s]?\d{3}\b')
     BANK_ACCOUNT = NamedPattern("BANK", r'\b\d{5}[\s\-]?\d{5}[\s\-]?\d{11}[\s\-]?\d{2}\b')
-    SECURITY_CODE = NamedPattern("CVV", r'\b\d{3,4}\b')
+    SECURITY_CODE = NamedPattern("CVV", r'\b(?i:cvv|cvc|cryptogramme|code\s+de\s+s[eé]curit[eé])[\s:]*(?P<security_code_value>\d{3,4})\b')
     PAYMENT_INFO = NamedPattern("PAYMENT", r'\b(Visa|MasterCard|Amex)\s[\*\d\s]{4,}\d{4}\b')
     
     # InfoPerso - Données de Contact et Localisation
     PHONE = NamedPattern("PHONE", r'\+?\d{1,3}[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,9}')
     EMAIL = NamedPattern("EMAIL", r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
     ADDRESS = NamedPattern("ADDRESS", r'\d+\s[A-Za-z\s]+,\s?\d{5}\s[A-Za-z\s]+')
-    POSTAL_CODE = NamedPattern("POSTAL", r'\b\d{5}\b')
+    POSTAL_CODE = NamedPattern("POSTAL", r'\b(?i:code\s+postal|cp)[\s:]*(?P<postal_code_value>\d{5})\b')
     COMPANY = NamedPattern("COMPANY", r'\b[A-Z][a-zA-Z\s&]{2,}\s(SA|SARL|SAS|EURL|SNC)\b')
     IP_ADDRESS = NamedPattern("IP", r'\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b')
 
-PII_PATTERNS = {
+# Lecture seule : le scanner combiné, les pré-filtres et _HS_TYPES (id entier -> type) en sont dérivés à l'import
+PII_PATTERNS = MappingProxyType({
     # TypeA
     "name": RegexPatterns.NAME,
     "full_name": RegexPatterns.FULL_NAME,
@@ -58,4 +73,138 @@ PII_PATTERNS = {
     "postal_code": RegexPatterns.POSTAL_CODE,
     "company": RegexPatterns.COMPANY,
     "ip_address": RegexPatterns.IP_ADDRESS
-}
\ No newline at end of file
+})
+
+# Scanner unique : alternation de tous les patterns (groupe nommé = type PII), compilé une fois à l'import.
+# Un seul passage sur le texte au lieu d'un finditer par type ; m.lastgroup donne le type trouvé.
+# À position égale la première alternative gagne : les patterns ancrés sur un mot-clé passent en premier
+# (sinon "Code Postal" serait pris comme nom), le téléphone très générique en dernier.
+_ANCHORED_PATTERNS = ("driving_license", "security_code", "postal_code")
+_GENERIC_PATTERNS = ("phone",)
+_PII_SCAN_ORDER = tuple(sorted(PII_PATTERNS, key=lambda t: -1 if t in _ANCHORED_PATTERNS else t in _GENERIC_PATTERNS))
+PII_COMBINED_PATTERN = re.compile("|".join(
+    f"(?P<{pii_type}>{PII_PATTERNS[pii_type].regex.pattern})" for pii_type in _PII_SCAN_ORDER
+))
+
+@lru_cache(maxsize=256)
+def _combined_pattern_for(pii_types: frozenset):
+    """Alternation restreinte aux types donnés (même ordre que PII_COMBINED_PATTERN)."""
+    return re.compile("|".join(
+        f"(?P<{pii_type}>{PII_PATTERNS[pii_type].regex.pattern})" for pii_type in _PII_SCAN_ORDER if pii_type in pii_types
+    ))
+
+def _build_hyperscan_db():
+    """Base Hyperscan (DFA multi-pattern) servant de pré-filtre au scanner `re`; None si indisponible.
+
+    Les \\b sont retirés (non supportés en mode UCP) : le pré-filtre matche alors un sur-ensemble
+    de ce que trouve `re`, il ne peut donc pas écarter à tort un texte.
+    """
+    if hyperscan is None:
+        return None
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[named.regex.pattern.replace(r'\b', '').encode('utf-8') for named in PII_PATTERNS.values()],
+            ids=list(range(len(PII_PATTERNS))),
+            elements=len(PII_PATTERNS),
+            flags=[hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_SINGLEMATCH] * len(PII_PATTERNS),
+        )
+        return db
+    except Exception:
+        return None
+
+_HS_DB = _build_hyperscan_db()
+_HS_TYPES = tuple(PII_PATTERNS)
+
+def _build_re2_set():
+    """Repli sans Hyperscan : RE2::Set des mêmes patterns (DFA unique, un passage) ; None si
+    google-re2 est absent ou si un pattern n'est pas accepté (aucun filtrage partiel)."""
+    if _HS_DB is not None or re2 is None:
+        return None
+    try:
+        re2_set = re2.Set.SearchSet(re2.Options())
+        for named in PII_PATTERNS.values():
+            re2_set.Add(named.regex.pattern)
+        re2_set.Compile()
+        return re2_set
+    except Exception:
+        return None
+
+_RE2_SET = _build_re2_set()
+# Hors ASCII, ou avec \v / \x1c-\x1f, \b \d \s divergent entre re et RE2 : pas de pré-filtre RE2
+_RE2_UNSAFE_CHARS = re.compile(r'[\x0b\x1c-\x1f]')
+# \x1c-\x1f : espaces pour \s unicode mais pas en re.ASCII (pas de scan bytes)
+_ASCII_UNSAFE_CHARS = re.compile(r'[\x1c-\x1f]')
+_hs_local = threading.local()
+
+def _hs_scratch():
+    scratch = getattr(_hs_local, 'scratch', None)
+    if scratch is None:
+        scratch = _hs_local.scratch = hyperscan.Scratch(_HS_DB)
+    return scratch
+
+def _re2_scan_pattern(text: str):
+    if not text.isascii() or _RE2_UNSAFE_CHARS.search(text):
+        return PII_COMBINED_PATTERN
+    try:
+        found = _RE2_SET.Match(text)
+    except Exception:
+        return PII_COMBINED_PATTERN
+    if not found:
+        return None
+    if len(found) == len(_HS_TYPES):
+        return PII_COMBINED_PATTERN
+    return _combined_pattern_for(frozenset(_HS_TYPES[i] for i in found))
+
+def pii_scan_pattern(text: str):
+    """Scanner `re` à utiliser pour `text` : un passage Hyperscan (à défaut RE2::Set) relève les types
+    susceptibles de matcher, puis seuls ceux-ci sont gardés dans l'alternation (None si aucun).
+
+    Le pré-filtre étant un sur-ensemble, les alternatives écartées ne pouvaient matcher nulle part :
+    les résultats sont identiques à PII_COMBINED_PATTERN. Sans pré-filtre, retourne le scanner complet.
+    """
+    if not text:
+        return None
+    if _HS_DB is None:
+        if _RE2_SET is not None:
+            return _re2_scan_pattern(text)
+        return PII_COMBINED_PATTERN
+    try:
+        found = set()
+        def _on_match(pattern_id, start, end, flags, context):
+            found.add(pattern_id)  # SINGLEMATCH : un seul rappel par pattern
+        _HS_DB.scan(text.encode('utf-8'), match_event_handler=_on_match, scratch=_hs_scratch())
+    except Exception:
+        return PII_COMBINED_PATTERN
+    if not found:
+        return None
+    if len(found) == len(_HS_TYPES):
+        return PII_COMBINED_PATTERN
+    return _combined_pattern_for(frozenset(_HS_TYPES[i] for i in found))
+
+def match_span(match):
+    """(type PII, début, fin) d'un match du scanner ; pour un pattern ancré, la seule valeur (groupe <type>_value)."""
+    pii_type = match.lastgroup
+    value_group = pii_type + "_value"
+    if value_group in match.re.groupindex:
+        return pii_type, match.start(value_group), match.end(value_group)
+    return pii_type, match.start(), match.end()
+
+@lru_cache(maxsize=256)
+def _bytes_scanner(scanner):
+    """Même alternation compilée en bytes (re.ASCII) : chemin bytes de sre, plus rapide.
+
+    Sur un texte ASCII sans \x1c-\x1f (espaces pour \s unicode seulement) les résultats sont
+    identiques : les littéraux accentués (é, °, à) ne peuvent matcher ni dans un cas ni dans l'autre.
+    """
+    return re.compile(scanner.pattern.encode('utf-8'), re.ASCII)
+
+def scan(text: str):
+    """Matches des patterns statiques en un passage : liste de (type PII, début, fin)."""
+    scanner = pii_scan_pattern(text)
+    if scanner is None:
+        return []
+    if text.isascii() and not _ASCII_UNSAFE_CHARS.search(text):
+        # Texte ASCII : offsets en octets == offsets en caractères
+        return [match_span(m) for m in _bytes_scanner(scanner).finditer(text.encode('ascii'))]
+    return [match_span(m) for m in scanner.finditer(text)]
@@ -1,14 +1,33 @@
 
 import hashlib
+import os
+from functools import lru_cache
+
+# Cache LRU des tokens déjà calculés (mêmes valeurs PII répétées dans et entre les documents ; 0 désactive)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "131072"))
+
+@lru_cache(maxsize=None)
+def _prefix_state(prefix: bytes):
+    # Préfixe "<clé>_" haché une seule fois ; chaque appel repart d'une copie de cet état
+    return hashlib.sha256(prefix)
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _hash(prefix: bytes, data: str) -> str:
+    hasher = _prefix_state(prefix).copy()
+    hasher.update(data.encode('utf-8'))
+    return hasher.hexdigest()[:16]
+
+def token_cache_info():
+    """Statistiques du cache de tokens (hits, misses, taille)."""
+    return _hash.cache_info()._asdict()
 
 class TokenManager:
     def __init__(self, key: str = None):
         # Clé par défaut robuste et unique pour IA_Guards
         self.key = key or "IA_GUARDS_PII_PROTECTION_2025_SECURE_KEY_Fr@nce"
+        self._prefix_bytes = f"{self.key}_".encode('utf-8')
 
     def generate_token(self, data: str) -> str:
         """Génère un token déterministe qui reste le même après redémarrage"""
         # Utilise SHA-256 qui est déterministe (pas de randomization)
-        hash_input = f"{self.key}_{data}".encode('utf-8')
-        stable_hash = hashlib.sha256(hash_input).hexdigest()[:16]
-        return f"TOKEN_{stable_hash}"
\ No newline at end of file
+        return f"TOKEN_{_hash(self._prefix_bytes, data)}"
\ No newline at end of file
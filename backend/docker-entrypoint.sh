@@ -67,6 +67,16 @@ except Exception as e:
 PY
 fi
 
+# Workers uvicorn: min(2, CPU) si WEB_CONCURRENCY n'est pas fourni (lu nativement par uvicorn).
+# Chaque worker charge ses propres modèles (spaCy, Presidio, CamemBERT, BERT : de l'ordre de 1 à 1,5 Go
+# avec INSTALL_ML=true) et ses propres caches (détection, LLM, tokens) : augmenter selon la mémoire
+if [ -z "${WEB_CONCURRENCY}" ]; then
+    CPUS=$(nproc 2>/dev/null || echo 1)
+    WEB_CONCURRENCY=$(( CPUS < 2 ? CPUS : 2 ))
+    export WEB_CONCURRENCY
+fi
+echo "⚙️ Workers uvicorn: ${WEB_CONCURRENCY}"
+
 # Afficher les informations de démarrage
 echo "🌐 Démarrage du serveur AI-Guards sur http://0.0.0.0:8000"
 echo "📚 Documentation API disponible sur http://localhost:8000/docs"